@@ -13,7 +13,11 @@ import aiohttp
 
 import voluptuous as vol
 from homeassistant import config_entries
-from homeassistant.const import EVENT_HOMEASSISTANT_START, __version__ as HAVERSION
+from homeassistant.const import (
+    EVENT_HOMEASSISTANT_START,
+    EVENT_HOMEASSISTANT_STOP,
+    __version__ as HAVERSION,
+)
 from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers.aiohttp_client import async_create_clientsession
 import homeassistant.helpers.config_validation as cv
@@ -30,10 +34,17 @@ from integrationhelper import Logger, Version
 
 from . import const
 from .api import HacsAPI, HacsRunningTask
-from .http import HacsWebResponse, HacsPluginView, HacsPlugin
+from .http import HacsWebResponse, HacsPluginView, HacsPlugin, precompile_templates
 from .hacsbase import const as hacsconst, Hacs
 from .hacsbase.data import HacsData
+from .hacsbase.scheduler import HacsScheduler
+from .hacsbase.graphql import HacsGraphQL
+from .hacsbase.search import HacsSearchIndex
+from .hacsbase.tree import HacsTreeIndex
 from .hacsbase.configuration import Configuration
+from .handler.assets import HacsAssetIndex
+from .handler.cache import HacsCachedSession
+from .handler.compress import async_precompress, shutdown_pool
 from .hacsbase.migration import ValidateData
 
 CONFIG_SCHEMA = vol.Schema(
@@ -47,6 +58,9 @@ CONFIG_SCHEMA = vol.Schema(
                 vol.Optional("appdaemon", default=False): cv.boolean,
                 vol.Optional("python_script", default=False): cv.boolean,
                 vol.Optional("theme", default=False): cv.boolean,
+                vol.Optional("registration_workers", default=5): vol.All(
+                    vol.Coerce(int), vol.Range(min=1)
+                ),
             }
         )
     },
@@ -112,10 +126,15 @@ async def hacs_startup(hacs):
     hacs.system.config_path = hacs.hass.config.path()
     hacs.system.ha_version = HAVERSION
     hacs.system.disabled = False
-    hacs.github = AIOGitHub(
-        hacs.configuration.token, async_create_clientsession(hacs.hass)
-    )
+    hacs.github_session = HacsCachedSession(async_create_clientsession(hacs.hass))
+    hacs.github = AIOGitHub(hacs.configuration.token, hacs.github_session)
     hacs.data = HacsData()
+    await hacs.data.async_restore_cache()
+    hacs.scheduler = HacsScheduler()
+    hacs.graphql = HacsGraphQL()
+    hacs.trees = HacsTreeIndex()
+    hacs.asset_index = HacsAssetIndex()
+    hacs.search = HacsSearchIndex()
 
     # Check minimum version
     if not check_version(hacs):
@@ -160,6 +179,12 @@ async def hacs_startup(hacs):
                 await async_remove_entry(hacs.hass, hacs.configuration.config_entry)
         return False
 
+    # Index the plugin files served to Lovelace
+    await hacs.asset_index.async_scan()
+
+    # Index the stored repositories for search
+    hacs.search.rebuild(hacs.repositories.entries())
+
     # Add aditional categories
     if hacs.configuration.appdaemon:
         const.ELEMENT_TYPES.append("appdaemon")
@@ -186,6 +211,10 @@ async def hacs_startup(hacs):
             notification_id="hacs_dev_mode",
         )
 
+    # Write pending changes on shutdown
+    hacs.hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, hacs.data.async_flush)
+    hacs.hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, shutdown_pool)
+
     # Add sensor
     add_sensor(hacs)
 
@@ -270,6 +299,11 @@ async def setup_frontend(hacs):
     hacs.hass.http.register_view(HacsRunningTask())
     hacs.hass.http.register_view(HacsWebResponse())
 
+    # Compile the templates before the first page view
+    await hacs.hass.async_add_executor_job(
+        precompile_templates, f"{hacs.system.config_path}/.storage/hacs.templates"
+    )
+
     # Add to sidepanel
     hacs.hass.components.frontend.async_register_built_in_panel(
         "iframe",
@@ -309,9 +343,19 @@ async def add_services(hacs):
         del hacs.hass.data["custom_components"]
         await async_get_custom_components(hacs.hass)
 
+    async def service_hacs_precompress(call):
+        """Compress all plugin files."""
+        root = f"{hacs.system.config_path}/www/community"
+        count = await async_precompress(hacs.hass, root)
+        hacs.logger.info(f"Processed {count} files in {root}")
+        await hacs.asset_index.async_scan()
+
     hacs.hass.services.async_register("hacs", "install", service_hacs_install)
     hacs.hass.services.async_register("hacs", "register", service_hacs_register)
     hacs.hass.services.async_register("hacs", "load", service_hacs_load)
+    hacs.hass.services.async_register(
+        "hacs", "precompress", service_hacs_precompress
+    )
 
 
 async def test_repositories(hacs):
@@ -350,6 +394,8 @@ async def async_remove_entry(hass, config_entry):
     Hacs().logger.info("Removing recuring tasks")
     for task in Hacs().tasks:
         task()
+    await Hacs().data.async_flush()
+    await hass.async_add_executor_job(shutdown_pool)
     Hacs().logger.info("Removing sensor")
     await hass.config_entries.async_forward_entry_unload(config_entry, "sensor")
     Hacs().logger.info("Removing sidepanel")
@@ -1,12 +1,23 @@
 """API Endpoins."""
+import base64
+import json
 from time import time
 from aiohttp import web
 
 from integrationhelper import Logger
 
+from .hacsbase.registry import RepositoryRecord, record_name
 from .http import HacsWebResponse
 
 APIRESPONSE = {}
+LISTING_LIMIT = 50
+LISTING_MAX_LIMIT = 250
+SEARCH_LIMIT = 20
+LISTING_SORT = {
+    "name": lambda x: x["name"].lower(),
+    "stars": lambda x: x["stars"] or 0,
+    "last_updated": lambda x: x["last_updated"] or "",
+}
 
 
 def apiresponse(classname):
@@ -19,18 +30,31 @@ class HacsAPI(HacsWebResponse):
     """HacsAPI class."""
 
     name = "hacsapi"
+    methods = ("post",)
 
     def __init__(self):
         """Initialize."""
         self.logger = Logger("hacs.api")
         self.url = self.hacsapi + "/{endpoint}"
 
+    async def get(self, request, endpoint):  # pylint: disable=unused-argument
+        """Handle HACS API GET requests, the query is used as postdata."""
+        if self.system.disabled:
+            return web.Response(status=404)
+        if "get" not in getattr(APIRESPONSE.get(endpoint), "methods", ()):
+            return web.Response(status=405)
+        return await self.handle(request, endpoint, request.query)
+
     async def post(self, request, endpoint):  # pylint: disable=unused-argument
         """Handle HACS API requests."""
         if self.system.disabled:
             return web.Response(status=404)
+        return await self.handle(request, endpoint, await request.post())
+
+    async def handle(self, request, endpoint, postdata):
+        """Call the response for the endpoint."""
         self.endpoint = endpoint
-        self.postdata = await request.post()
+        self.postdata = postdata
         self.raw_headers = request.raw_headers
         self.request = request
         self.logger.debug(f"Endpoint ({endpoint}) called")
@@ -83,6 +107,184 @@ class Generic(HacsAPI):
         return web.HTTPFound(f"/hacsweb/{self.token}/settings?timestamp={time()}")
 
 
+def listing_item(entry):
+    """Return the listing fields of a repository, or a stored record."""
+    if isinstance(entry, RepositoryRecord):
+        data = entry.data
+        return {
+            "uid": entry.uid,
+            "full_name": entry.full_name,
+            "name": record_name(entry),
+            "category": entry.category,
+            "description": data.get("description"),
+            "installed": bool(data.get("installed")),
+            "pending_upgrade": False,
+            "hidden": bool(data.get("hide")),
+            "new": data.get("new", True),
+            "stars": data.get("stars") or 0,
+            "last_updated": data.get("last_updated"),
+            "installed_version": data.get("version_installed"),
+            "available_version": data.get("last_release_tag")
+            or data.get("last_commit"),
+        }
+    view = entry.view
+    return {
+        "uid": entry.information.uid,
+        "full_name": entry.information.full_name,
+        "name": view.name,
+        "category": entry.information.category,
+        "description": entry.information.description,
+        "installed": entry.status.installed,
+        "pending_upgrade": view.pending_upgrade,
+        "hidden": entry.status.hide,
+        "new": entry.status.new,
+        "stars": entry.information.stars,
+        "last_updated": entry.information.last_updated,
+        "installed_version": view.installed_version,
+        "available_version": view.available_version,
+    }
+
+
+def query_flag(value):
+    """Return a bool for a query flag, or None if it is not set."""
+    if value is None or value == "":
+        return None
+    return value.lower() in ("1", "true", "yes")
+
+
+def encode_cursor(key, full_name):
+    """Return an opaque cursor for the position after an item."""
+    return base64.urlsafe_b64encode(json.dumps([key, full_name]).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return the position in a cursor."""
+    key, full_name = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    return key, full_name
+
+
+@apiresponse
+class Repositories(HacsAPI):
+    """List repositories as JSON, one page at a time.
+
+    Hidden repositories are left out unless 'hidden' is set, an empty
+    value matches everything.
+    """
+
+    name = "repositories"
+    methods = ("get",)
+
+    async def response(self):
+        """Response."""
+        query = self.postdata
+        sort = query.get("sort", "name")
+        if sort not in LISTING_SORT:
+            return web.json_response({"error": f"Unknown sort '{sort}'"}, status=400)
+        descending = query.get("order", "asc" if sort == "name" else "desc") == "desc"
+        try:
+            limit = min(int(query.get("limit", LISTING_LIMIT)), LISTING_MAX_LIMIT)
+            after = decode_cursor(query["cursor"]) if query.get("cursor") else None
+        except (TypeError, ValueError):
+            return web.json_response({"error": "Invalid limit or cursor"}, status=400)
+
+        filters = {
+            "category": query.get("category"),
+            "installed": query_flag(query.get("installed")),
+            "pending_upgrade": query_flag(query.get("pending_upgrade")),
+            "hidden": query_flag(query.get("hidden", "false")),
+            "new": query_flag(query.get("new")),
+        }
+        items = []
+        for entry in self.repositories.entries():
+            item = listing_item(entry)
+            if any(
+                value is not None and item[name] != value
+                for name, value in filters.items()
+            ):
+                continue
+            items.append(item)
+
+        sort_key = LISTING_SORT[sort]
+        items.sort(key=lambda x: (sort_key(x), x["full_name"]), reverse=descending)
+
+        start = 0
+        if after is not None:
+            after = (after[0], after[1])
+            try:
+                for start, item in enumerate(items):
+                    position = (sort_key(item), item["full_name"])
+                    if (position < after) if descending else (position > after):
+                        break
+                else:
+                    start = len(items)
+            except TypeError:
+                # A cursor from another sort order.
+                return web.json_response({"error": "Invalid cursor"}, status=400)
+
+        page = items[start : start + max(limit, 1)]
+        cursor = None
+        if start + len(page) < len(items):
+            cursor = encode_cursor(sort_key(page[-1]), page[-1]["full_name"])
+        return web.json_response(
+            {"repositories": page, "cursor": cursor, "total": len(items)}
+        )
+
+
+@apiresponse
+class Search(HacsAPI):
+    """Search repositories by name, description, topics and authors."""
+
+    name = "search"
+    methods = ("get",)
+
+    async def response(self):
+        """Response."""
+        query = self.postdata
+        if not query.get("q"):
+            return web.json_response({"error": "Query is missing"}, status=400)
+        try:
+            limit = min(int(query.get("limit", SEARCH_LIMIT)), LISTING_MAX_LIMIT)
+        except (TypeError, ValueError):
+            return web.json_response({"error": "Invalid limit"}, status=400)
+        category = query.get("category")
+
+        items = []
+        for full_name, score in self.search.search(query["q"]):
+            entry = self.repositories.get_entry(full_name)
+            if entry is None:
+                # Removed since it was indexed.
+                self.search.mark(full_name)
+                continue
+            item = listing_item(entry)
+            if category is not None and item["category"] != category:
+                continue
+            item["score"] = round(score, 2)
+            items.append(item)
+        return web.json_response(
+            {"repositories": items[: max(limit, 1)], "total": len(items)}
+        )
+
+
+@apiresponse
+class RepositoryStatus(HacsAPI):
+    """Return if the information of a repository is being refreshed."""
+
+    name = "repository_status"
+    methods = ("get",)
+
+    async def response(self):
+        """Response."""
+        repository = self.repositories.get_by_id(self.postdata.get("repository"))
+        if repository is None:
+            return web.json_response({"error": "Unknown repository"}, status=404)
+        return web.json_response(
+            {
+                "refreshing": repository.refreshing,
+                "updated": repository.status.updated_info,
+            }
+        )
+
+
 @apiresponse
 class RemoveNewFlag(HacsAPI):
     """Remove new flag on all repositories."""
@@ -91,7 +293,11 @@ class RemoveNewFlag(HacsAPI):
 
     async def response(self):
         """Response."""
-        for repository in self.repositories:
+        for repository in self.repositories.entries():
+            if isinstance(repository, RepositoryRecord):
+                repository.data = {**repository.data, "new": False}
+                self.data.mark(repository.uid)
+                continue
             repository.status.new = False
         self.data.write()
         return web.HTTPFound(
@@ -181,7 +387,8 @@ class RepositoryUpdate(HacsAPI):
     async def response(self):
         """Response."""
         repository = self.get_by_id(self.postdata["repository_id"])
-        await repository.update_repository()
+        async with repository.lock:
+            await repository.update_repository()
         self.data.write()
         return web.HTTPFound(
             f"/hacsweb/{self.token}/repository/{repository.information.uid}?timestamp={time()}"
@@ -225,7 +432,7 @@ class RepositoryHide(HacsAPI):
     async def response(self):
         """Response."""
         repository = self.get_by_id(self.postdata["repository_id"])
-        repository.hide = True
+        repository.status.hide = True
         self.data.write()
         return web.HTTPFound(f"/hacsweb/{self.token}/store?timestamp={time()}")
 
@@ -239,7 +446,7 @@ class RepositoryUnhide(HacsAPI):
     async def response(self):
         """Response."""
         repository = self.get_by_id(self.postdata["repository_id"])
-        repository.hide = False
+        repository.status.hide = False
         self.data.write()
         return web.HTTPFound(f"/hacsweb/{self.token}/settings?timestamp={time()}")
 
@@ -254,7 +461,8 @@ class RepositoryBetaHide(HacsAPI):
         """Response."""
         repository = self.get_by_id(self.postdata["repository_id"])
         repository.status.show_beta = False
-        await repository.update_repository()
+        async with repository.lock:
+            await repository.update_repository()
         self.data.write()
         return web.HTTPFound(
             f"/hacsweb/{self.token}/repository/{repository.information.uid}?timestamp={time()}"
@@ -271,7 +479,8 @@ class RepositoryBetaShow(HacsAPI):
         """Response."""
         repository = self.get_by_id(self.postdata["repository_id"])
         repository.status.show_beta = True
-        await repository.update_repository()
+        async with repository.lock:
+            await repository.update_repository()
         self.data.write()
         return web.HTTPFound(
             f"/hacsweb/{self.token}/repository/{repository.information.uid}?timestamp={time()}"
@@ -298,8 +507,8 @@ class RepositoriesUpgradeAll(HacsAPI):
 
     async def response(self):
         """Response."""
-        for repository in self.repositories:
-            if repository.pending_upgrade:
+        for repository in self.repositories.hydrated():
+            if repository.view.pending_upgrade:
                 await repository.install()
         self.data.write()
         return web.HTTPFound(f"/hacsweb/{self.token}/settings?timestamp={time()}")
@@ -355,8 +564,7 @@ class RepositoryRegister(HacsAPI):
                     f"/hacsweb/{self.token}/settings?timestamp={time()}&message={message}"
                 )
 
-            if repository_name in self.common.blacklist:
-                self.common.blacklist.remove(repository_name)
+            self.common.blacklist.discard(repository_name)
 
             await self.register_repository(repository_name, repository_type)
 
@@ -392,10 +600,12 @@ class RepositorySelectTag(HacsAPI):
             repository.status.selected_tag = self.postdata["selected_tag"]
 
         try:
-            await repository.update_repository()
+            async with repository.lock:
+                await repository.update_repository()
         except (AIOGitHubException, HacsRequirement):
             repository.status.selected_tag = repository.releases.last_release
-            await repository.update_repository()
+            async with repository.lock:
+                await repository.update_repository()
             message = "The version {} is not valid for use with HACS.".format(
                 self.postdata["selected_tag"]
             )
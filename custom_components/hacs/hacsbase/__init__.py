@@ -1,5 +1,6 @@
 """Initialize the HACS base."""
 # pylint: disable=unused-argument, bad-continuation
+import asyncio
 import json
 import uuid
 from datetime import timedelta
@@ -12,23 +13,29 @@ from integrationhelper import Logger
 
 from ..handler.logger import HacsLogger
 from .const import ELEMENT_TYPES
+from .registry import HacsRegistry
 
 
 class HacsStatus:
     """HacsStatus."""
 
     startup = False
-    background_task = False
+    background_tasks = set()
+
+    @property
+    def background_task(self):
+        """Return a bool if a background task is running."""
+        return bool(self.background_tasks)
 
 
 class HacsCommon:
     """Common for HACS."""
 
     categories = []
-    blacklist = []
-    default = []
-    installed = []
-    skip = []
+    blacklist = set()
+    default = set()
+    installed = set()
+    skip = set()
 
 
 class System:
@@ -63,13 +70,19 @@ class Hacs:
     token = f"{str(uuid.uuid4())}-{str(uuid.uuid4())}"
     hacsweb = f"/hacsweb/{token}"
     hacsapi = f"/hacsapi/{token}"
-    repositories = []
+    repositories = HacsRegistry()
     repo = None
     developer = Developer()
     data = None
     configuration = None
     logger = Logger("hacs")
     github = None
+    github_session = None
+    graphql = None
+    trees = None
+    asset_index = None
+    search = None
+    scheduler = None
     hass = None
     version = None
     system = System()
@@ -78,41 +91,42 @@ class Hacs:
 
     def get_by_id(self, repository_id):
         """Get repository by ID."""
-        try:
-            for repository in self.repositories:
-                if repository.information.uid == repository_id:
-                    return repository
-        except Exception:  # pylint: disable=broad-except
-            pass
-        return None
+        return self.repositories.get_by_id(repository_id)
 
     def get_by_name(self, repository_full_name):
         """Get repository by full_name."""
-        try:
-            for repository in self.repositories:
-                if repository.information.full_name == repository_full_name:
-                    return repository
-        except Exception:  # pylint: disable=broad-except
-            pass
-        return None
+        return self.repositories.get_by_name(repository_full_name)
 
     def is_known(self, repository_full_name):
         """Return a bool if the repository is known."""
-        for repository in self.repositories:
-            if repository.information.full_name == repository_full_name:
-                return True
-        return False
+        return self.repositories.is_known(repository_full_name)
 
     @property
     def sorted_by_name(self):
         """Return a sorted(by name) list of repository objects."""
-        return sorted(self.repositories, key=lambda x: x.display_name)
+        return sorted(self.repositories, key=lambda x: x.view.name)
 
     @property
     def sorted_by_repository_name(self):
         """Return a sorted(by repository_name) list of repository objects."""
         return sorted(self.repositories, key=lambda x: x.information.full_name)
 
+    def is_custom(self, full_name):
+        """Return a bool if the repository is not a default repository."""
+        if full_name.split("/")[0] in ["custom-components", "custom-cards"]:
+            return False
+        return full_name not in self.common.default
+
+    @property
+    def custom_repositories(self):
+        """Return the custom repositories, sorted by repository name.
+
+        Only the custom repositories are hydrated.
+        """
+        names = sorted(x for x in self.repositories.names() if self.is_custom(x))
+        repositories = [self.get_by_name(x) for x in names]
+        return [x for x in repositories if x is not None]
+
     async def register_repository(self, full_name, category, check=True):
         """Register a repository."""
         from ..repositories.repository import RERPOSITORY_CLASSES
@@ -130,15 +144,16 @@ class Hacs:
             try:
                 await repository.registration()
                 if repository.validate.errors:
-                    self.common.skip.append(repository.information.full_name)
+                    self.common.skip.add(repository.information.full_name)
                     if not self.system.status.startup:
                         self.logger.error(f"Validation for {full_name} failed.")
                     return repository.validate.errors
                 repository.logger.info("Registration complete")
+                repository.release_objects()
             except AIOGitHubException as exception:
                 self.logger.debug(self.github.ratelimits.remaining)
                 self.logger.debug(self.github.ratelimits.reset_utc)
-                self.common.skip.append(repository.information.full_name)
+                self.common.skip.add(repository.information.full_name)
                 if not self.system.status.startup:
                     self.logger.error(
                         f"Validation for {full_name} failed with {exception}."
@@ -148,7 +163,7 @@ class Hacs:
 
     async def startup_tasks(self):
         """Tasks tha are started after startup."""
-        self.system.status.background_task = True
+        self.system.status.background_tasks.add("startup")
         self.logger.debug(self.github.ratelimits.remaining)
         self.logger.debug(self.github.ratelimits.reset_utc)
         await self.load_known_repositories()
@@ -165,7 +180,7 @@ class Hacs:
         )
 
         self.system.status.startup = False
-        self.system.status.background_task = False
+        self.system.status.background_tasks.discard("startup")
         self.data.write()
 
     async def recuring_tasks_installed(self, notarealarg=None):
@@ -173,50 +188,38 @@ class Hacs:
         self.logger.debug(
             "Starting recuring background task for installed repositories"
         )
-        self.system.status.background_task = True
+        self.system.status.background_tasks.add("installed")
         self.logger.debug(self.github.ratelimits.remaining)
         self.logger.debug(self.github.ratelimits.reset_utc)
-        for repository in self.repositories:
-            if repository.status.installed:
-                try:
-                    await repository.update_repository()
-                    repository.logger.debug("Information update done.")
-                except AIOGitHubException:
-                    self.system.status.background_task = False
-                    self.data.write()
-                    self.logger.debug(
-                        "Recuring background task for installed repositories done"
-                    )
-                    return
-        self.system.status.background_task = False
+        installed = [x for x in self.repositories.hydrated() if x.status.installed]
+        try:
+            await self.scheduler.run(installed, 30 * 60, resume=False)
+        finally:
+            self.system.status.background_tasks.discard("installed")
         self.data.write()
         self.logger.debug("Recuring background task for installed repositories done")
 
     async def recuring_tasks_all(self, notarealarg=None):
         """Recuring tasks for all repositories."""
         self.logger.debug("Starting recuring background task for all repositories")
-        self.system.status.background_task = True
+        self.system.status.background_tasks.add("all")
         self.logger.debug(self.github.ratelimits.remaining)
         self.logger.debug(self.github.ratelimits.reset_utc)
-        for repository in self.repositories:
-            try:
-                await repository.update_repository()
-                repository.logger.debug("Information update done.")
-            except AIOGitHubException:
-                self.system.status.background_task = False
-                self.data.write()
-                self.logger.debug("Recuring background task for all repositories done")
-                return
-        await self.load_known_repositories()
-        self.clear_out_blacklisted_repositories()
-        self.system.status.background_task = False
+        try:
+            if await self.scheduler.run(self.repositories.entries(), 800 * 60):
+                await self.load_known_repositories()
+                self.clear_out_blacklisted_repositories()
+            else:
+                self.logger.debug(f"Refresh will resume from {self.scheduler.cursor}")
+        finally:
+            self.system.status.background_tasks.discard("all")
         self.data.write()
         self.logger.debug("Recuring background task for all repositories done")
 
     def clear_out_blacklisted_repositories(self):
         """Clear out blaclisted repositories."""
         need_to_save = False
-        for repository in self.common.blacklist:
+        for repository in list(self.common.blacklist):
             if self.is_known(repository):
                 repository = self.get_by_name(repository)
                 if repository.status.installed:
@@ -259,8 +262,7 @@ class Hacs:
 
         for category in repositories:
             for repo in repositories[category]:
-                if repo not in self.common.default:
-                    self.common.default.append(repo)
+                self.common.default.add(repo)
         return repositories
 
     async def load_known_repositories(self):
@@ -269,17 +271,49 @@ class Hacs:
         blacklist = await self.repo.get_contents("repositories/blacklist", "data")
         repositories = await self.get_repositories()
 
-        for item in json.loads(blacklist.content):
-            if item not in self.common.blacklist:
-                self.common.blacklist.append(item)
+        self.common.blacklist.update(json.loads(blacklist.content))
+
+        await self.register_repositories(repositories)
 
+    async def register_repositories(self, repositories):
+        """Register repositories with a bounded pool of workers."""
+        queue = asyncio.Queue()
+        queued = set()
         for category in repositories:
             for repo in repositories[category]:
-                if repo in self.common.blacklist:
+                if repo in self.common.blacklist or repo in queued:
                     continue
                 if self.is_known(repo):
                     continue
+                queued.add(repo)
+                queue.put_nowait((repo, category))
+
+        total = queue.qsize()
+        if not total:
+            return
+        await self.graphql.prefetch(list(queued))
+        progress = {"done": 0}
+        workers = min(self.configuration.registration_workers, total)
+        self.logger.info(f"Registering {total} repositories with {workers} workers")
+
+        async def worker():
+            """Register repositories from the queue until it is empty."""
+            while True:
                 try:
-                    await self.register_repository(repo, category)
-                except (AIOGitHubException, AIOGitHubRatelimit):
-                    pass
+                    repo, category = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                if not self.is_known(repo):
+                    try:
+                        await self.register_repository(repo, category)
+                    except (AIOGitHubException, AIOGitHubRatelimit):
+                        pass
+                progress["done"] += 1
+                if progress["done"] % 50 == 0 or progress["done"] == total:
+                    self.logger.debug(
+                        f"Registered {progress['done']} of {total} repositories"
+                    )
+
+        await asyncio.gather(*[worker() for _ in range(workers)])
+        self.graphql.clear()
+        self.logger.info(f"Registration of {total} repositories done")
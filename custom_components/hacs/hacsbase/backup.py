@@ -47,7 +47,10 @@ class Backup:
             rmtree(self.local_path)
             while os.path.exists(self.local_path):
                 sleep(0.1)
-        copy2(self.backup_path, self.local_path)
+        if os.path.isfile(self.backup_path):
+            copy2(self.backup_path, self.local_path)
+        else:
+            copy_tree(self.backup_path, self.local_path)
         self.logger.debug(f"Restored {self.local_path}, from backup {self.backup_path}")
 
     def cleanup(self):
@@ -56,3 +59,48 @@ class Backup:
         while os.path.exists(self.backup_path):
             sleep(0.1)
         self.logger.debug(f"Backup dir {self.backup_path} cleared")
+
+
+class BackupFiles:
+    """Backup of some files in a directory."""
+
+    def __init__(self, local_path, files):
+        """initialize."""
+        self.logger = Logger("hacs.backup")
+        self.local_path = local_path
+        self.files = files
+        self.existing = set()
+        self.backup_path = "/tmp/hacs_backup_files"
+
+    def create(self):
+        """Copy the files to /tmp"""
+        if os.path.exists(self.backup_path):
+            rmtree(self.backup_path)
+        for filename in self.files:
+            source = f"{self.local_path}/{filename}"
+            if not os.path.isfile(source):
+                continue
+            target = f"{self.backup_path}/{filename}"
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            copy2(source, target)
+            self.existing.add(filename)
+        self.logger.debug(
+            f"Backup of {len(self.existing)} files in {self.local_path}, created in {self.backup_path}"
+        )
+
+    def restore(self):
+        """Put the files back, and remove the ones that did not exist."""
+        for filename in self.files:
+            target = f"{self.local_path}/{filename}"
+            if filename in self.existing:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                copy2(f"{self.backup_path}/{filename}", target)
+            elif os.path.isfile(target):
+                os.remove(target)
+        self.logger.debug(f"Restored {self.local_path}, from backup {self.backup_path}")
+
+    def cleanup(self):
+        """Cleanup backup files."""
+        if os.path.exists(self.backup_path):
+            rmtree(self.backup_path)
+        self.logger.debug(f"Backup dir {self.backup_path} cleared")
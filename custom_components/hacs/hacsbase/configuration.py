@@ -39,6 +39,13 @@ class Configuration:
             return self.config["dev"]
         return False
 
+    @property
+    def registration_workers(self):
+        """Number of repositories to register concurrently."""
+        if self.config.get("registration_workers") is not None:
+            return self.config["registration_workers"]
+        return 5
+
     @property
     def plugin_path(self):
         """Plugin path."""
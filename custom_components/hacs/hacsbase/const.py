@@ -5,6 +5,21 @@ from ..const import ELEMENT_TYPES
 STORAGE_VERSION = "5"
 STORENAME = "hacs"
 
+# Requests kept free for interactive actions during background refreshes
+RESERVED_REQUESTS = 500
+# Estimated number of GitHub requests for one repository refresh
+REQUESTS_PER_REPOSITORY = 8
+# Seconds to collect changes before the store files are written
+STORAGE_WRITE_DELAY = 5
+# Journaled repository changes before they are compacted into a snapshot
+STORAGE_JOURNAL_LIMIT = 500
+# Seconds between writes of the GitHub request cache
+CACHE_WRITE_INTERVAL = 15 * 60
+# Files downloaded at the same time during an install
+DOWNLOAD_CONCURRENCY = 5
+# Bytes one extra file request is worth, when choosing the tarball instead
+ARCHIVE_FILE_COST = 100 * 1024
+
 # Messages
 NOT_SUPPORTED_HA_VERSION = "You have version '{}' of Home Assistant, but version '{}' of '{}' require version '{}' of Home Assistant, install and upgrades are disabled for this integration untill you upgrade Home Assistant."
 
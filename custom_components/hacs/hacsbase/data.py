@@ -1,9 +1,19 @@
 """Data handler for HACS."""
 import os
 import json
+import hashlib
+from asyncio import Lock
+from time import time
+from homeassistant.helpers.event import async_call_later
 from integrationhelper import Logger
 from . import Hacs
-from .const import STORAGE_VERSION
+from .registry import RepositoryRecord
+from .const import (
+    CACHE_WRITE_INTERVAL,
+    STORAGE_JOURNAL_LIMIT,
+    STORAGE_VERSION,
+    STORAGE_WRITE_DELAY,
+)
 from ..const import VERSION
 
 
@@ -12,7 +22,9 @@ STORES = {
     "hacs": "hacs.hacs",
     "installed": "hacs.installed",
     "repositories": "hacs.repositories",
+    "etags": "hacs.etags",
 }
+JOURNAL = "hacs.repositories.journal"
 
 
 class HacsData(Hacs):
@@ -21,38 +33,130 @@ class HacsData(Hacs):
     def __init__(self):
         """Initialize."""
         self.logger = Logger("hacs.data")
+        self.dirty = False
+        self.dirty_repositories = False
+        self.pending_write = None
+        self.write_lock = Lock()
+        self.written = {}
+        self.revisions = {}
+        self.changed = set()
+        self.snapshot_needed = False
+        self.journal_length = 0
+        self.generation = 0
+        self.cache_written = time()
 
     def check_corrupted_files(self):
         """Return True if one (or more) of the files are corrupted."""
         for store in STORES:
+            if store == "etags":
+                # The request cache is disposable.
+                continue
             path = f"{self.system.config_path}/.storage/{STORES[store]}"
             if os.path.exists(path):
-                if os.stat(path).st_size == 0:
-                    # File is empty (corrupted)
+                if load(path) is None and load(f"{path}.bak") is None:
+                    # Empty, unreadable or checksum mismatch (corrupted)
                     return True
         return False
 
     def read(self, store):
-        """Return data from a store."""
+        """Return data from a store, falling back to the previous generation."""
         path = f"{self.system.config_path}/.storage/{STORES[store]}"
-        content = None
-        if os.path.exists(path):
-            with open(path, "r", encoding="utf-8") as storefile:
-                content = storefile.read()
-                content = json.loads(content)
+        content = load(path)
+        if content is None and os.path.exists(f"{path}.bak"):
+            content = load(f"{path}.bak")
+            if content is not None:
+                self.logger.warning(f"Restored {STORES[store]} from backup")
         return content
 
-    def write(self):
-        """Write content to the store files."""
-        if self.system.status.background_task:
+    def write(self, repositories=True):
+        """Mark the data as changed, and schedule a write of the store files.
+
+        Changes within STORAGE_WRITE_DELAY seconds are written together.
+        The scheduler passes repositories=False while it refreshes, so only
+        its cursor is written until something else changes.
+        """
+        self.dirty = True
+        if repositories:
+            self.dirty_repositories = True
+        if self.pending_write is None:
+            self.pending_write = async_call_later(
+                self.hass, STORAGE_WRITE_DELAY, self.async_delayed_flush
+            )
+
+    async def async_delayed_flush(self, _):
+        """Write pending changes when the delay has passed."""
+        self.pending_write = None
+        await self.async_write()
+
+    async def async_flush(self, _=None):
+        """Write everything that changed, used when HACS is stopped."""
+        if self.dirty:
+            self.dirty_repositories = True
+        await self.async_write(final=True)
+
+    async def async_write(self, final=False):
+        """Write pending changes to the store files in the executor.
+
+        The request cache is written every CACHE_WRITE_INTERVAL seconds,
+        and when HACS is stopped.
+        """
+        if self.pending_write is not None:
+            self.pending_write()
+            self.pending_write = None
+        if self.dirty:
+            repositories = self.dirty_repositories
+            self.dirty = False
+            self.dirty_repositories = False
+            stores, journal, state = self.collect(repositories)
+            async with self.write_lock:
+                saved = await self.hass.async_add_executor_job(
+                    save_stores, stores, journal
+                )
+            if saved and state is not None:
+                self.written.update(state["records"])
+                for uid in state["removed"]:
+                    self.written.pop(uid, None)
+                    self.revisions.pop(uid, None)
+                self.revisions.update(state["revisions"])
+                self.changed -= state["marked"]
+                self.generation = state["generation"]
+                self.journal_length = state["journal_length"]
+                self.snapshot_needed = False
+            elif not saved:
+                # Try again with the next write. A journal append may have
+                # been torn, so the repositories go into a new snapshot.
+                self.dirty = True
+                self.dirty_repositories = self.dirty_repositories or repositories
+                self.snapshot_needed = self.snapshot_needed or repositories
+
+        session = self.github_session
+        if session is None or not session.dirty:
+            return
+        if not final and time() - self.cache_written < CACHE_WRITE_INTERVAL:
             return
+        self.cache_written = time()
+        path = f"{self.system.config_path}/.storage/{STORES['etags']}"
+        await self.hass.async_add_executor_job(save_cache, path, session.dump())
 
-        self.logger.debug("Saving data")
+    def collect(self, repositories=True):
+        """Return a list of (path, content) to write, journal changes, and
+        the repository state to keep once they are written (or None).
+        """
+        stores = []
+        journal = None
 
         # Hacs
         path = f"{self.system.config_path}/.storage/{STORES['hacs']}"
-        hacs = {"view": self.configuration.frontend_mode}
-        save(path, hacs)
+        hacs = {
+            "view": self.configuration.frontend_mode,
+            "refresh_cursor": self.scheduler.cursor,
+        }
+        stores.append((path, hacs))
+
+        if not repositories:
+            return stores, journal, None
+
+        self.logger.debug("Saving data")
 
         # Installed
         path = f"{self.system.config_path}/.storage/{STORES['installed']}"
@@ -67,33 +171,38 @@ class HacsData(Hacs):
                 "version_installed": repository.display_installed_version,
                 "version_available": repository.display_available_version,
             }
-        save(path, installed)
+        stores.append((path, installed))
 
-        # Repositories
+        # Repositories, only the ones that changed since the last write.
         path = f"{self.system.config_path}/.storage/{STORES['repositories']}"
-        content = {}
-        for repository in self.repositories:
-            content[repository.information.uid] = {
-                "authors": repository.information.authors,
-                "category": repository.information.category,
-                "description": repository.information.description,
-                "full_name": repository.information.full_name,
-                "hide": repository.status.hide,
-                "installed_commit": repository.versions.installed_commit,
-                "installed": repository.status.installed,
-                "last_commit": repository.versions.available_commit,
-                "last_release_tag": repository.versions.available,
-                "name": repository.information.name,
-                "new": repository.status.new,
-                "selected_tag": repository.status.selected_tag,
-                "show_beta": repository.status.show_beta,
-                "version_installed": repository.versions.installed,
-            }
+        records = {}
+        revisions = {}
+        for repository in self.repositories.hydrated():
+            uid = repository.information.uid
+            if uid is not None:
+                uid = str(uid)
+            revision = stored_revision(repository)
+            if uid is None or self.revisions.get(uid) == revision:
+                continue
+            revisions[uid] = revision
+            record = stored_record(repository)
+            if self.written.get(uid) != record:
+                records[uid] = record
+        marked = set(self.changed)
+        removed = []
+        for uid in marked:
+            entry = self.repositories.get_entry_by_id(uid)
+            if entry is None:
+                if uid in self.written:
+                    removed.append(uid)
+            elif isinstance(entry, RepositoryRecord):
+                if self.written.get(uid) != entry.data:
+                    records[uid] = entry.data
 
         # Validate installed repositories
         count_installed = len(installed) + 1  # For HACS it self
         count_installed_restore = 0
-        for repository in self.repositories:
+        for repository in self.repositories.hydrated():
             if repository.status.installed:
                 count_installed_restore += 1
 
@@ -102,8 +211,159 @@ class HacsData(Hacs):
             self.logger.debug(
                 f"Number of installed repositories does not match the number of stored repositories [{count_installed} vs {count_installed_restore}]"
             )
-            return
-        save(path, content)
+            return stores, journal, None
+
+        # Entries carry the generation of the snapshot they apply to.
+        entries = [
+            {"uid": uid, "data": record, "generation": self.generation}
+            for uid, record in records.items()
+        ]
+        entries += [{"uid": uid, "generation": self.generation} for uid in removed]
+        journal_path = f"{self.system.config_path}/.storage/{JOURNAL}"
+        compact = self.snapshot_needed or not self.written or (
+            self.journal_length + len(entries) > STORAGE_JOURNAL_LIMIT
+        )
+        # Applied once the files are written.
+        state = {
+            "records": records,
+            "removed": removed,
+            "revisions": revisions,
+            "marked": marked,
+            "generation": self.generation,
+            "journal_length": self.journal_length + len(entries),
+        }
+        if compact:
+            # Compact into a new snapshot, the journal of the previous one is
+            # ignored on restore if it is not removed.
+            content = dict(self.written)
+            content.update(records)
+            for uid in removed:
+                content.pop(uid, None)
+            state["generation"] += 1
+            state["journal_length"] = 0
+            stores.append((path, content, state["generation"]))
+            journal = (journal_path, None)
+        elif entries:
+            journal = (journal_path, entries)
+        return stores, journal, state
+
+    def mark(self, uid):
+        """Write the repository with the next write, for changes to records
+        and removals, changes to repositories are found from their revisions.
+        """
+        if uid is not None:
+            self.changed.add(str(uid))
+
+    def read_journal(self):
+        """Return the journaled repository changes."""
+        path = f"{self.system.config_path}/.storage/{JOURNAL}"
+        entries = []
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as journalfile:
+                for line in journalfile:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        # Torn write, the rest of the journal is unusable.
+                        self.logger.warning("Ignoring incomplete journal entry")
+                        break
+        return entries
+
+    async def async_restore_cache(self):
+        """Restore the GitHub request cache, it is read in the executor."""
+        try:
+            content = await self.hass.async_add_executor_job(self.read, "etags")
+            self.github_session.load(content)
+        except Exception as exception:  # pylint: disable=broad-except
+            self.logger.debug(f"[{exception}] Could not restore the request cache")
+
+    def hydrate(self, record):
+        """Return a repository object for a stored record."""
+        from ..repositories.repository import RERPOSITORY_CLASSES
+
+        if record.category not in RERPOSITORY_CLASSES:
+            self.logger.error(f"{record.category} is not a valid repository category.")
+            return None
+        repository = RERPOSITORY_CLASSES[record.category](record.full_name)
+        self.restore_repository(repository, record.uid, record.data, record.installed)
+        return repository
+
+    def restore_repository(self, repository, entry, repo, frominstalled=None):
+        """Restore repository attributes from stored data."""
+        if repo.get("authors") is not None:
+            repository.information.authors = repo["authors"]
+
+        if repo.get("description") is not None:
+            repository.information.description = repo["description"]
+
+        if repo.get("name") is not None:
+            repository.information.name = repo["name"]
+
+        if repo.get("stars") is not None:
+            repository.information.stars = repo["stars"]
+
+        if repo.get("topics") is not None:
+            repository.information.topics = repo["topics"]
+
+        if repo.get("hide") is not None:
+            repository.status.hide = repo["hide"]
+
+        if repo.get("installed") is not None:
+            repository.status.installed = repo["installed"]
+            if repository.status.installed:
+                repository.status.first_install = False
+
+        if repo.get("selected_tag") is not None:
+            repository.status.selected_tag = repo["selected_tag"]
+
+        if repo.get("show_beta") is not None:
+            repository.status.show_beta = repo["show_beta"]
+
+        if repo.get("last_commit") is not None:
+            repository.versions.available_commit = repo["last_commit"]
+
+        repository.information.uid = entry
+
+        if repo.get("last_release_tag") is not None:
+            repository.releases.last_release = repo["last_release_tag"]
+            repository.versions.available = repo["last_release_tag"]
+
+        if repo.get("new") is not None:
+            repository.status.new = repo["new"]
+
+        if repo.get("last_updated") is not None:
+            repository.information.last_updated = repo["last_updated"]
+
+        if repo["full_name"] == "custom-components/hacs":
+            repository.versions.installed = VERSION
+            if "b" in VERSION:
+                repository.status.show_beta = True
+        elif repo.get("version_installed") is not None:
+            repository.versions.installed = repo["version_installed"]
+
+        if repo.get("installed_commit") is not None:
+            repository.versions.installed_commit = repo["installed_commit"]
+
+        if repo.get("installed_files") is not None:
+            repository.versions.installed_files = repo["installed_files"]
+
+        if frominstalled is not None:
+            repository.status.installed = True
+            repository.status.new = False
+            if frominstalled["version_type"] == "commit":
+                repository.versions.installed_commit = frominstalled[
+                    "version_installed"
+                ]
+                repository.versions.available_commit = frominstalled[
+                    "version_available"
+                ]
+            else:
+                repository.versions.installed = frominstalled[
+                    "version_installed"
+                ]
+                repository.versions.available = frominstalled[
+                    "version_available"
+                ]
 
     async def restore(self):
         """Restore saved data."""
@@ -124,95 +384,53 @@ class HacsData(Hacs):
             # Hacs
             hacs = hacs["data"]
             self.configuration.frontend_mode = hacs["view"]
+            self.scheduler.cursor = hacs.get("refresh_cursor")
 
             # Installed
             installed = installed["data"]
-            for repository in installed:
-                self.common.installed.append(repository)
-
-            # Repositories
-            repositrories = repositrories["data"]
+            self.common.installed.update(installed)
+
+            # Repositories (snapshot + journal)
+            self.generation = (repositrories or {}).get("generation", 0)
+            repositrories = (repositrories or {}).get("data", {})
+            journal = self.read_journal()
+            for change in journal:
+                if change.get("generation", 0) < self.generation:
+                    # Written before the snapshot, it is already in there.
+                    continue
+                if "data" in change:
+                    repositrories[change["uid"]] = change["data"]
+                else:
+                    repositrories.pop(change["uid"], None)
+            self.written = dict(repositrories)
+            self.repositories.hydrator = self.hydrate
+            self.journal_length = len(journal)
             for entry in repositrories:
                 repo = repositrories[entry]
-                if not self.is_known(repo["full_name"]):
-                    await self.register_repository(
-                        repo["full_name"], repo["category"], False
+                if self.is_known(repo["full_name"]):
+                    repository = self.get_by_name(repo["full_name"])
+                    self.restore_repository(
+                        repository, entry, repo, installed.get(repo["full_name"])
                     )
-                repository = self.get_by_name(repo["full_name"])
-                if repository is None:
-                    self.logger.error(f"Did not find {repo['full_name']}")
+                    self.repositories.reindex(repository)
                     continue
 
-                # Restore repository attributes
-                if repo.get("authors") is not None:
-                    repository.information.authors = repo["authors"]
-
-                if repo.get("description") is not None:
-                    repository.information.description = repo["description"]
-
-                if repo.get("name") is not None:
-                    repository.information.name = repo["name"]
-
-                if repo.get("hide") is not None:
-                    repository.status.hide = repo["hide"]
-
-                if repo.get("installed") is not None:
-                    repository.status.installed = repo["installed"]
-                    if repository.status.installed:
-                        repository.status.first_install = False
-
-                if repo.get("selected_tag") is not None:
-                    repository.status.selected_tag = repo["selected_tag"]
-
-                if repo.get("show_beta") is not None:
-                    repository.status.show_beta = repo["show_beta"]
-
-                if repo.get("last_commit") is not None:
-                    repository.versions.available_commit = repo["last_commit"]
-
-                repository.information.uid = entry
-
-                if repo.get("last_release_tag") is not None:
-                    repository.releases.last_release = repo["last_release_tag"]
-                    repository.versions.available = repo["last_release_tag"]
-
-                if repo.get("new") is not None:
-                    repository.status.new = repo["new"]
-
-                if repo["full_name"] == "custom-components/hacs":
-                    repository.versions.installed = VERSION
-                    if "b" in VERSION:
-                        repository.status.show_beta = True
-                elif repo.get("version_installed") is not None:
-                    repository.versions.installed = repo["version_installed"]
-
-                if repo.get("installed_commit") is not None:
-                    repository.versions.installed_commit = repo["installed_commit"]
-
-                if repo["full_name"] in self.common.installed:
-                    repository.status.installed = True
-                    repository.status.new = False
-                    frominstalled = installed[repo["full_name"]]
-                    if frominstalled["version_type"] == "commit":
-                        repository.versions.installed_commit = frominstalled[
-                            "version_installed"
-                        ]
-                        repository.versions.available_commit = frominstalled[
-                            "version_available"
-                        ]
-                    else:
-                        repository.versions.installed = frominstalled[
-                            "version_installed"
-                        ]
-                        repository.versions.available = frominstalled[
-                            "version_available"
-                        ]
+                # Keep a compact record, hydrate it when it is needed.
+                self.repositories.append(
+                    RepositoryRecord(entry, repo, installed.get(repo["full_name"]))
+                )
+                if repo.get("installed") or repo["full_name"] in self.common.installed:
+                    # Installed repositories are always loaded, they are
+                    # checked below and updated by the scheduler.
+                    repository = self.repositories.get_by_name(repo["full_name"])
+                    if repository is None:
+                        self.logger.error(f"Did not find {repo['full_name']}")
 
             # Check the restore.
             count_installed = len(installed) + 1  # For HACS it self
             count_installed_restore = 0
             installed_restore = []
-            for repository in self.repositories:
+            for repository in self.repositories.hydrated():
                 if repository.status.installed:
                     installed_restore.append(repository.information.full_name)
                     if (
@@ -242,16 +460,152 @@ class HacsData(Hacs):
         return True
 
 
-def save(path, content):
-    """Save file."""
-    from .backup import Backup
+def stored_revision(repository):
+    """Return the revisions of the stored parts of a repository."""
+    return (
+        repository.information.revision,
+        repository.status.revision,
+        repository.versions.revision,
+    )
+
+
+def stored_record(repository):
+    """Return the stored record of a repository."""
+    return {
+        "authors": repository.information.authors,
+        "category": repository.information.category,
+        "description": repository.information.description,
+        "full_name": repository.information.full_name,
+        "hide": repository.status.hide,
+        "installed_commit": repository.versions.installed_commit,
+        "installed_files": repository.versions.installed_files,
+        "installed": repository.status.installed,
+        "last_commit": repository.versions.available_commit,
+        "last_release_tag": repository.versions.available,
+        "last_updated": repository.information.last_updated,
+        "name": repository.information.name,
+        "new": repository.status.new,
+        "selected_tag": repository.status.selected_tag,
+        "show_beta": repository.status.show_beta,
+        "stars": repository.information.stars,
+        "topics": repository.information.topics,
+        "version_installed": repository.versions.installed,
+    }
+
+
+def save_stores(stores, journal=None):
+    """Save a list of (path, content), then update the journal.
+
+    stores are (path, content) or (path, content, generation), journal is
+    (path, entries), entries None truncates the journal once the stores
+    are written. Returns a bool if everything was written.
+    """
+    for store in stores:
+        if not save(*store):
+            return False
+    if journal is None:
+        return True
+    path, entries = journal
+    try:
+        if entries is None:
+            if os.path.exists(path):
+                os.remove(path)
+            return True
+        with open(path, "a", encoding="utf-8") as journalfile:
+            for entry in entries:
+                journalfile.write(json.dumps(entry) + "\n")
+            journalfile.flush()
+            os.fsync(journalfile.fileno())
+    except OSError as exception:
+        Logger("hacs.data").error(f"[{exception}] Could not update {path}")
+        return False
+    return True
+
+
+def sync_directory(path):
+    """Make a rename in the directory of path durable."""
+    try:
+        descriptor = os.open(os.path.dirname(path), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+
+def save_cache(path, content):
+    """Save the request cache, compact and without a backup.
+
+    The cache is disposable, so it has no checksum.
+    """
+    temp = f"{path}.tmp"
+    try:
+        with open(temp, "w", encoding="utf-8") as storefile:
+            json.dump(
+                {"data": content, "schema": STORAGE_VERSION},
+                storefile,
+                separators=(",", ":"),
+            )
+        os.replace(temp, path)
+    except Exception as exception:  # pylint: disable=broad-except
+        Logger("hacs.data").error(f"[{exception}] Could not save {path}")
+        if os.path.exists(temp):
+            os.remove(temp)
+
+
+def checksum(data):
+    """Return the checksum of store data."""
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+
 
-    backup = Backup(path)
-    backup.create()
+def load(path):
+    """Return the content of a store file, None if missing or corrupted."""
+    if not os.path.exists(path) or os.stat(path).st_size == 0:
+        return None
     try:
-        content = {"data": content, "schema": STORAGE_VERSION}
-        with open(path, "w", encoding="utf-8") as storefile:
+        with open(path, "r", encoding="utf-8") as storefile:
+            content = json.load(storefile)
+    except ValueError:
+        return None
+    if "checksum" in content and content["checksum"] != checksum(content.get("data")):
+        return None
+    return content
+
+
+def save(path, content, generation=None):
+    """Save file, returns a bool if it was written.
+
+    The content is written to a temporary file that replaces the store
+    file, the previous generation is kept as .bak.
+    """
+    temp = f"{path}.tmp"
+    content = {
+        "data": content,
+        "schema": STORAGE_VERSION,
+        "checksum": checksum(content),
+    }
+    if generation is not None:
+        content["generation"] = generation
+    try:
+        with open(temp, "w", encoding="utf-8") as storefile:
             json.dump(content, storefile, indent=4)
-    except Exception:  # pylint: disable=broad-except
-        backup.restore()
-    backup.cleanup()
+            storefile.flush()
+            os.fsync(storefile.fileno())
+        if os.path.exists(path):
+            if os.path.exists(f"{path}.bak"):
+                os.remove(f"{path}.bak")
+            try:
+                os.link(path, f"{path}.bak")
+            except OSError:
+                os.replace(path, f"{path}.bak")
+        os.replace(temp, path)
+        sync_directory(path)
+    except Exception as exception:  # pylint: disable=broad-except
+        Logger("hacs.data").error(f"[{exception}] Could not save {path}")
+        if os.path.exists(temp):
+            os.remove(temp)
+        return False
+    return True
@@ -0,0 +1,140 @@
+"""Batched repository metadata from the GitHub GraphQL API."""
+import json
+
+import async_timeout
+from integrationhelper import Logger
+
+from . import Hacs
+
+GRAPHQL_URL = "https://api.github.com/graphql"
+BATCH_SIZE = 50
+
+REPOSITORY_FIELDS = """
+    nameWithOwner
+    databaseId
+    description
+    isArchived
+    pushedAt
+    stargazers { totalCount }
+    defaultBranchRef { name target { ... on Commit { oid } } }
+    repositoryTopics(first: 20) { nodes { topic { name } } }
+    releases(first: 10, orderBy: {field: CREATED_AT, direction: DESC}) {
+        nodes { tagName isPrerelease isDraft }
+    }
+"""
+
+
+class PrefetchedRelease:
+    """Release information from a batch, without assets."""
+
+    def __init__(self, tag_name, prerelease):
+        """Initialize."""
+        self.tag_name = tag_name
+        self.prerelease = prerelease
+        self.assets = None
+
+
+def build_query(full_names):
+    """Return an aliased query for a list of repositories."""
+    parts = []
+    for index, full_name in enumerate(full_names):
+        owner, name = full_name.split("/")
+        parts.append(
+            f"r{index}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) "
+            f"{{{REPOSITORY_FIELDS}}}"
+        )
+    return "query {\n" + "\n".join(parts) + "\n}"
+
+
+def parse_repository(node):
+    """Return the prefetched data for one repository node."""
+    branch = node.get("defaultBranchRef") or {}
+    commit = (branch.get("target") or {}).get("oid")
+    releases = [
+        PrefetchedRelease(release["tagName"], release["isPrerelease"])
+        for release in (node.get("releases") or {}).get("nodes", [])
+        if not release.get("isDraft")
+    ]
+    return {
+        "uid": str(node["databaseId"]),
+        "description": node.get("description"),
+        "archived": node.get("isArchived", False),
+        "pushed_at": node.get("pushedAt"),
+        "stars": (node.get("stargazers") or {}).get("totalCount", 0),
+        "default_branch": branch.get("name"),
+        # The REST client exposes the last commit as a short sha.
+        "last_commit": commit[0:7] if commit else None,
+        "topics": [
+            topic["topic"]["name"]
+            for topic in (node.get("repositoryTopics") or {}).get("nodes", [])
+        ],
+        "releases": releases,
+    }
+
+
+class HacsGraphQL(Hacs):
+    """Prefetch repository metadata in batches."""
+
+    def __init__(self):
+        """Initialize."""
+        self.logger = Logger("hacs.graphql")
+        self.url = GRAPHQL_URL
+        self.prefetched = {}
+
+    async def query(self, query):
+        """Run a GraphQL query and return the response, with data and errors."""
+        headers = {"Authorization": f"bearer {self.configuration.token}"}
+        async with async_timeout.timeout(30):
+            response = await self.github_session.post(
+                self.url, headers=headers, json={"query": query}
+            )
+            content = await response.json()
+        if content.get("errors"):
+            self.logger.debug(content["errors"])
+        return content
+
+    async def prefetch(self, full_names):
+        """Fetch metadata for repositories, BATCH_SIZE at a time.
+
+        Repositories that do not exist are stored as None, nothing is stored
+        for the rest of a failed batch so those are fetched with REST. The
+        batches after a failed one would fail the same way, so those are
+        not sent.
+        """
+        full_names = [x for x in full_names if len(x.split("/")) == 2]
+        for start in range(0, len(full_names), BATCH_SIZE):
+            batch = full_names[start : start + BATCH_SIZE]
+            try:
+                content = await self.query(build_query(batch))
+            except Exception as exception:  # pylint: disable=broad-except
+                self.logger.debug(f"[{exception}] Batch query failed")
+                break
+            data = content.get("data")
+            if not data:
+                # Rate limited, server or authorization error.
+                self.logger.debug("Batch query returned no data")
+                break
+            not_found = {
+                error["path"][0]
+                for error in content.get("errors") or []
+                if error.get("type") == "NOT_FOUND" and error.get("path")
+            }
+            for index, full_name in enumerate(batch):
+                node = data.get(f"r{index}")
+                if node is not None:
+                    self.prefetched[full_name] = parse_repository(node)
+                elif f"r{index}" in not_found:
+                    self.prefetched[full_name] = None
+            self.logger.debug(f"Prefetched {len(batch)} repositories")
+
+    def has(self, full_name):
+        """Return a bool if there is prefetched data for the repository."""
+        return full_name in self.prefetched
+
+    def take(self, full_name):
+        """Return and forget the prefetched data for a repository."""
+        return self.prefetched.pop(full_name, None)
+
+    def clear(self):
+        """Forget prefetched data that was not used."""
+        self.prefetched = {}
@@ -0,0 +1,239 @@
+"""Repository registry for HACS."""
+
+# Statuses with a sorted view, "new" ignores the category.
+VIEWS = ("installed", "available", "hidden", "new")
+
+
+class RepositoryRecord:
+    """Stored repository that has not been hydrated yet."""
+
+    __slots__ = ("uid", "full_name", "category", "data", "installed")
+
+    def __init__(self, uid, data, installed=None):
+        """Initialize."""
+        self.uid = uid
+        self.full_name = data["full_name"]
+        self.category = data["category"]
+        self.data = data
+        self.installed = installed
+
+
+def record_name(record):
+    """Return the display name of a stored record, like display_name."""
+    name = record.data.get("name") or record.full_name
+    if record.category != "integration":
+        name = name.replace("-", " ").replace("_", " ").title()
+    return name
+
+
+class HacsRegistry:
+    """Indexed collection of repositories.
+
+    Entries are either repository objects or RepositoryRecords, records
+    are hydrated into repository objects the first time they are needed.
+    """
+
+    def __init__(self):
+        """Initialize."""
+        self.hydrator = None
+        self._by_uid = {}
+        self._by_name = {}
+        self._by_category = {}
+        self._keys = {}
+        self._views = None
+
+    def __iter__(self):
+        """Iterate over a snapshot of all repositories, hydrating records."""
+        repositories = [self._hydrate(x) for x in list(self._by_name.values())]
+        return iter([x for x in repositories if x is not None])
+
+    def __len__(self):
+        """Return the number of registered repositories."""
+        return len(self._by_name)
+
+    def __contains__(self, repository):
+        """Return a bool if the repository object is registered."""
+        return id(repository) in self._keys
+
+    @staticmethod
+    def _key(full_name):
+        """Return the index key for a full_name."""
+        if full_name is None:
+            return None
+        return full_name.lower()
+
+    @staticmethod
+    def _fields(entry):
+        """Return uid, full_name and category of an entry."""
+        if isinstance(entry, RepositoryRecord):
+            return entry.uid, entry.full_name, entry.category
+        information = entry.information
+        return information.uid, information.full_name, information.category
+
+    def entries(self):
+        """Return all entries, without hydrating records."""
+        return list(self._by_name.values())
+
+    def names(self):
+        """Return the full_name of all entries, without hydrating records."""
+        return [self._fields(x)[1] for x in self._by_name.values()]
+
+    def hydrated(self):
+        """Return the repositories that are hydrated."""
+        return [
+            x for x in self._by_name.values() if not isinstance(x, RepositoryRecord)
+        ]
+
+    def append(self, repository):
+        """Add a repository (or record) to the registry."""
+        existing = self._by_name.get(self._key(self._fields(repository)[1]))
+        if existing is not None:
+            self.remove(existing)
+        self._index(repository)
+
+    def remove(self, repository):
+        """Remove a repository from the registry."""
+        if id(repository) not in self._keys:
+            return
+        self._unindex(repository)
+
+    def reindex(self, repository):
+        """Update the indexes after uid, full_name or category changed."""
+        if id(repository) not in self._keys:
+            return
+        self._unindex(repository)
+        self._index(repository)
+
+    def invalidate_views(self):
+        """Forget the sorted views, they are built again when used."""
+        self._views = None
+
+    @staticmethod
+    def _view_fields(entry):
+        """Return name, category, installed, hide and new of an entry."""
+        if isinstance(entry, RepositoryRecord):
+            data = entry.data
+            return (
+                record_name(entry),
+                entry.category,
+                bool(data.get("installed")),
+                bool(data.get("hide")),
+                data.get("new", True),
+            )
+        status = entry.status
+        return (
+            entry.view.name,
+            entry.information.category,
+            status.installed,
+            status.hide,
+            status.new,
+        )
+
+    def _build_views(self):
+        """Sort all entries by display name once, and bucket their keys.
+
+        Records are bucketed from their stored data, without hydrating.
+        """
+        views = {}
+        entries = sorted(
+            (self._view_fields(entry), name) for name, entry in self._by_name.items()
+        )
+        for (_, category, installed, hide, new), name in entries:
+            if new:
+                views.setdefault((None, "new"), []).append(name)
+            if hide:
+                views.setdefault((category, "hidden"), []).append(name)
+                views.setdefault((None, "hidden"), []).append(name)
+                continue
+            if installed:
+                views.setdefault((category, "installed"), []).append(name)
+            if name != "custom-components/hacs":
+                views.setdefault((category, "available"), []).append(name)
+        return views
+
+    def view(self, category, status):
+        """Return repositories in a category (None for all) with a status.
+
+        The status is one of VIEWS, repositories are sorted by display name.
+        Only the repositories in the view are hydrated.
+        """
+        if self._views is None:
+            self._views = self._build_views()
+        repositories = [
+            self._hydrate(self._by_name.get(name))
+            for name in self._views.get((category, status), [])
+        ]
+        return [x for x in repositories if x is not None]
+
+    def _index(self, entry):
+        """Add the entry to the indexes."""
+        self._views = None
+        uid, full_name, category = self._fields(entry)
+        uid = None if uid is None else str(uid)
+        name = self._key(full_name)
+        if uid is not None:
+            self._by_uid[uid] = entry
+        self._by_name[name] = entry
+        self._by_category.setdefault(category, {})[id(entry)] = entry
+        self._keys[id(entry)] = (uid, name, category)
+
+    def _unindex(self, entry):
+        """Remove the entry from the indexes."""
+        self._views = None
+        uid, name, category = self._keys.pop(id(entry), (None, None, None))
+        if self._by_uid.get(uid) is entry:
+            del self._by_uid[uid]
+        if self._by_name.get(name) is entry:
+            del self._by_name[name]
+        self._by_category.get(category, {}).pop(id(entry), None)
+
+    def _hydrate(self, entry):
+        """Return a repository object for the entry."""
+        if not isinstance(entry, RepositoryRecord):
+            return entry
+        # Restoring the stored fields does not move it between views.
+        views = self._views
+        repository = self.hydrator(entry)
+        uid, name, category = self._keys.pop(id(entry))
+        self._by_category.get(category, {}).pop(id(entry), None)
+        if self._by_uid.get(uid) is entry:
+            del self._by_uid[uid]
+        if repository is None:
+            del self._by_name[name]
+            return None
+        # Replacing the value keeps the key, and the order, of the record.
+        self._by_name[name] = repository
+        self._index(repository)
+        self._views = views
+        return repository
+
+    def get_by_id(self, repository_id):
+        """Get repository by ID."""
+        if repository_id is None:
+            return None
+        return self._hydrate(self._by_uid.get(str(repository_id)))
+
+    def get_entry_by_id(self, repository_id):
+        """Get repository or record by ID, without hydrating."""
+        if repository_id is None:
+            return None
+        return self._by_uid.get(str(repository_id))
+
+    def get_by_name(self, repository_full_name):
+        """Get repository by full_name."""
+        return self._hydrate(self._by_name.get(self._key(repository_full_name)))
+
+    def get_entry(self, repository_full_name):
+        """Get repository or record by full_name, without hydrating."""
+        return self._by_name.get(self._key(repository_full_name))
+
+    def is_known(self, repository_full_name):
+        """Return a bool if the repository is known."""
+        return self._key(repository_full_name) in self._by_name
+
+    def by_category(self, category):
+        """Return a list of repositories in a category."""
+        repositories = [
+            self._hydrate(x) for x in list(self._by_category.get(category, {}).values())
+        ]
+        return [x for x in repositories if x is not None]
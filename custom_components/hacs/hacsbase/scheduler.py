@@ -0,0 +1,158 @@
+"""Rate limit aware scheduler for HACS background tasks."""
+from asyncio import sleep
+from time import time
+
+from aiogithubapi import AIOGitHubException, AIOGitHubRatelimit
+from integrationhelper import Logger
+
+from . import Hacs
+from .const import REQUESTS_PER_REPOSITORY, RESERVED_REQUESTS
+from .graphql import BATCH_SIZE
+from .registry import RepositoryRecord
+
+
+def full_name_of(entry):
+    """Return the full_name of a repository or a stored record."""
+    if isinstance(entry, RepositoryRecord):
+        return entry.full_name
+    return entry.information.full_name
+
+
+class HacsScheduler(Hacs):
+    """Pace background refreshes against the GitHub rate limit."""
+
+    def __init__(self):
+        """Initialize."""
+        self.logger = Logger("hacs.scheduler")
+        self.cursor = None
+        self.running = False
+        self.active = 0
+
+    @property
+    def remaining(self):
+        """Return the number of requests left in this rate limit window."""
+        try:
+            return int(self.github.ratelimits.remaining)
+        except (AttributeError, TypeError, ValueError):
+            return None
+
+    @property
+    def seconds_to_reset(self):
+        """Return the number of seconds until the rate limit resets."""
+        try:
+            return max(int(self.github.ratelimits.reset) - int(time()), 0)
+        except (AttributeError, TypeError, ValueError):
+            return None
+
+    @property
+    def available(self):
+        """Return the budget left for background tasks."""
+        if self.remaining is None:
+            return None
+        return self.remaining - RESERVED_REQUESTS
+
+    def pending(self, repositories):
+        """Return repositories in refresh order, starting at the cursor."""
+        repositories = sorted(repositories, key=full_name_of)
+        if self.cursor is None:
+            return repositories
+        for index, repository in enumerate(repositories):
+            if full_name_of(repository) >= self.cursor:
+                return repositories[index:]
+        return []
+
+    def hydrate_if_changed(self, record):
+        """Return the repository for a record, or None if it has not moved."""
+        if self.graphql.has(record.full_name):
+            prefetched = self.graphql.prefetched[record.full_name]
+            if (
+                prefetched is not None
+                and prefetched["pushed_at"] is not None
+                and prefetched["pushed_at"] == record.data.get("last_updated")
+            ):
+                self.graphql.take(record.full_name)
+                return None
+        return self.get_by_name(record.full_name)
+
+    async def throttle(self, left, deadline):
+        """Wait until there is budget for the next repository.
+
+        Returns False if that can not happen before the deadline.
+        """
+        available = self.available
+        if available is None:
+            return True
+
+        if available < REQUESTS_PER_REPOSITORY:
+            reset = self.seconds_to_reset
+            if reset is None or time() + reset > deadline:
+                self.logger.debug(
+                    f"Budget exhausted ({self.remaining} left), stopping at {self.cursor}"
+                )
+                return False
+            self.logger.debug(f"Budget exhausted, waiting {reset}s for reset")
+            await sleep(reset + 1)
+            return True
+
+        needed = left * REQUESTS_PER_REPOSITORY
+        reset = self.seconds_to_reset
+        if needed > available and reset:
+            # Spread what is left of the budget over what is left of the window.
+            await sleep(reset * REQUESTS_PER_REPOSITORY / available)
+        return True
+
+    async def run(self, repositories, interval, resume=True):
+        """Update repositories within the interval (seconds).
+
+        Only one resumable pass runs at a time, a pass without resume (the
+        installed repositories) runs next to it. Returns True when every
+        repository was processed.
+        """
+        if resume:
+            if self.running:
+                self.logger.debug("A refresh is already running")
+                return False
+            self.running = True
+        self.active += 1
+        deadline = time() + interval
+        if resume:
+            repositories = self.pending(repositories)
+        try:
+            for index, repository in enumerate(repositories):
+                if resume:
+                    self.cursor = full_name_of(repository)
+                    if index and index % 25 == 0:
+                        self.data.write(repositories=False)
+                if not await self.throttle(len(repositories) - index, deadline):
+                    return False
+                if index % BATCH_SIZE == 0:
+                    batch = repositories[index : index + BATCH_SIZE]
+                    await self.graphql.prefetch([full_name_of(x) for x in batch])
+                if isinstance(repository, RepositoryRecord):
+                    repository = self.hydrate_if_changed(repository)
+                    if repository is None:
+                        continue
+                try:
+                    async with repository.lock:
+                        await repository.update_repository(delta=True)
+                        repository.release_objects()
+                    repository.logger.debug("Information update done.")
+                except AIOGitHubRatelimit:
+                    reset = self.seconds_to_reset
+                    if reset is None or time() + reset > deadline:
+                        return False
+                    await sleep(reset + 1)
+                except AIOGitHubException as exception:
+                    repository.logger.debug(f"Information update failed {exception}")
+            if resume:
+                self.cursor = None
+            return True
+        finally:
+            if resume:
+                self.running = False
+            self.active -= 1
+            if not self.active:
+                self.graphql.clear()
+            self.logger.debug(
+                f"Rate limit: {self.github.ratelimits.remaining} left, reset at {self.github.ratelimits.reset_utc}"
+            )
@@ -0,0 +1,191 @@
+"""Full-text search over repositories."""
+import re
+from bisect import bisect_left, insort
+
+from . import Hacs
+from .registry import RepositoryRecord
+
+# Weight of a match in each field.
+FIELDS = {
+    "name": 5.0,
+    "full_name": 3.0,
+    "topics": 3.0,
+    "authors": 2.0,
+    "description": 1.0,
+}
+# Weight of a match by kind, relative to an exact match.
+PREFIX = 0.7
+FUZZY = 0.4
+# Prefixes expanded per query term.
+PREFIX_EXPANSIONS = 50
+# Terms shorter than this are not matched fuzzily.
+FUZZY_MIN_LENGTH = 4
+
+TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Return the lowercase tokens in text."""
+    if not text:
+        return []
+    if isinstance(text, (list, tuple)):
+        text = " ".join(str(x) for x in text)
+    return TOKEN.findall(str(text).lower())
+
+
+def deletes(token):
+    """Return the token with each character deleted once."""
+    return {token[:i] + token[i + 1 :] for i in range(len(token))}
+
+
+def document(entry):
+    """Return the searchable fields of a repository, or a stored record."""
+    if isinstance(entry, RepositoryRecord):
+        data = entry.data
+        return {
+            "name": data.get("name"),
+            "full_name": entry.full_name,
+            "description": data.get("description"),
+            "authors": data.get("authors"),
+            "topics": data.get("topics"),
+        }
+    information = entry.information
+    return {
+        "name": information.name,
+        "full_name": information.full_name,
+        "description": information.description,
+        "authors": information.authors,
+        "topics": information.topics,
+    }
+
+
+class HacsSearchIndex(Hacs):
+    """Inverted index with prefix and fuzzy (one edit) matching.
+
+    Repositories with changed searchable fields are marked, and indexed
+    again before the next search.
+    """
+
+    def __init__(self):
+        """Initialize."""
+        self.pending = set()
+        self.postings = {}
+        self.documents = {}
+        self.tokens = []
+        self.variants = {}
+
+    def clear(self):
+        """Forget everything."""
+        self.pending = set()
+        self.postings = {}
+        self.documents = {}
+        self.tokens = []
+        self.variants = {}
+
+    def __len__(self):
+        """Return the number of indexed repositories."""
+        return len(self.documents)
+
+    def rebuild(self, entries):
+        """Index all entries."""
+        self.clear()
+        for entry in entries:
+            self.update(entry)
+
+    def mark(self, full_name):
+        """Index a repository again before the next search."""
+        if full_name is not None:
+            self.pending.add(full_name.lower())
+
+    def refresh(self):
+        """Index the marked repositories again."""
+        pending, self.pending = self.pending, set()
+        for full_name in pending:
+            entry = self.repositories.get_entry(full_name)
+            if entry is None:
+                self.remove(full_name)
+            else:
+                self.update(entry)
+
+    def update(self, entry):
+        """Index a repository again, after it changed."""
+        fields = document(entry)
+        key = fields["full_name"].lower()
+        weights = {}
+        for field, value in fields.items():
+            for token in tokenize(value):
+                weights[token] = max(weights.get(token, 0), FIELDS[field])
+        if self.documents.get(key) == weights:
+            return
+        self.remove(key)
+        self.documents[key] = weights
+        for token, weight in weights.items():
+            if token not in self.postings:
+                self.postings[token] = {}
+                insort(self.tokens, token)
+                for variant in deletes(token) | {token}:
+                    self.variants.setdefault(variant, set()).add(token)
+            self.postings[token][key] = weight
+
+    def remove(self, full_name):
+        """Remove a repository from the index."""
+        weights = self.documents.pop(full_name.lower(), None)
+        if weights is None:
+            return
+        for token in weights:
+            postings = self.postings[token]
+            postings.pop(full_name.lower(), None)
+            if postings:
+                continue
+            del self.postings[token]
+            del self.tokens[bisect_left(self.tokens, token)]
+            for variant in deletes(token) | {token}:
+                tokens = self.variants.get(variant)
+                if tokens is not None:
+                    tokens.discard(token)
+                    if not tokens:
+                        del self.variants[variant]
+
+    def expand(self, term):
+        """Return {token: weight} for the tokens matching a query term."""
+        matches = {}
+        if term in self.postings:
+            matches[term] = 1.0
+        start = bisect_left(self.tokens, term)
+        for token in self.tokens[start : start + PREFIX_EXPANSIONS]:
+            if not token.startswith(term):
+                break
+            matches.setdefault(token, PREFIX)
+        if not matches and len(term) >= FUZZY_MIN_LENGTH:
+            for variant in deletes(term) | {term}:
+                for token in self.variants.get(variant, ()):
+                    matches.setdefault(token, FUZZY)
+        return matches
+
+    def search(self, query):
+        """Return [(full_name, score)], best match first.
+
+        Every term in the query has to match.
+        """
+        self.refresh()
+        scores = None
+        for term in set(tokenize(query)):
+            term_scores = {}
+            for token, weight in self.expand(term).items():
+                for key, field_weight in self.postings[token].items():
+                    score = weight * field_weight
+                    if score > term_scores.get(key, 0):
+                        term_scores[key] = score
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {
+                    key: score + term_scores[key]
+                    for key, score in scores.items()
+                    if key in term_scores
+                }
+            if not scores:
+                return []
+        if scores is None:
+            return []
+        return sorted(scores.items(), key=lambda x: (-x[1], x[0]))
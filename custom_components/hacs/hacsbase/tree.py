@@ -0,0 +1,113 @@
+"""Recursive git tree listings of repositories."""
+from collections import OrderedDict
+
+import async_timeout
+from aiogithubapi import AIOGitHubException
+from integrationhelper import Logger
+
+from . import Hacs
+
+TREE_CACHE_SIZE = 100
+
+
+class TreeEntry:
+    """File or directory in a git tree, shaped like a contents object."""
+
+    __slots__ = ("path", "name", "type", "sha", "size", "download_url")
+
+    def __init__(self, full_name, ref, entry):
+        """Initialize."""
+        self.path = entry["path"]
+        self.name = self.path.split("/")[-1]
+        self.type = "dir" if entry["type"] == "tree" else "file"
+        self.sha = entry["sha"]
+        self.size = entry.get("size")
+        self.download_url = None
+        if self.type == "file":
+            self.download_url = (
+                f"https://raw.githubusercontent.com/{full_name}/{ref}/{self.path}"
+            )
+
+
+class RepositoryTree:
+    """Index of a recursive git tree."""
+
+    def __init__(self, full_name, ref, sha, entries):
+        """Initialize."""
+        self.full_name = full_name
+        self.ref = ref
+        self.sha = sha
+        self.entries = {}
+        self.children = {"": []}
+        for entry in entries:
+            if entry["type"] not in ("blob", "tree"):
+                # Submodules are not part of the repository content.
+                continue
+            entry = TreeEntry(full_name, ref, entry)
+            self.entries[entry.path] = entry
+            parent = "/".join(entry.path.split("/")[:-1])
+            self.children.setdefault(parent, []).append(entry)
+            if entry.type == "dir":
+                self.children.setdefault(entry.path, [])
+
+    def list_dir(self, path):
+        """Return the entries in a directory, like get_contents does."""
+        path = path.strip("/")
+        if path not in self.children:
+            raise AIOGitHubException(f"{path} does not exist in the repository")
+        return list(self.children[path])
+
+    def exists(self, path):
+        """Return a bool if the path exists."""
+        path = path.strip("/")
+        return path == "" or path in self.entries
+
+    def blob_sha(self, path):
+        """Return the blob sha of a file, or None."""
+        entry = self.entries.get(path.strip("/"))
+        if entry is None or entry.type != "file":
+            return None
+        return entry.sha
+
+
+class HacsTreeIndex(Hacs):
+    """Fetch and cache recursive git trees."""
+
+    def __init__(self):
+        """Initialize."""
+        self.logger = Logger("hacs.tree")
+        self.trees = OrderedDict()
+
+    async def get(self, full_name, ref):
+        """Return the tree of a ref, or None if it can not be used."""
+        ref = ref.replace("tags/", "")
+        url = f"https://api.github.com/repos/{full_name}/git/trees/{ref}"
+        headers = {
+            "Accept": "application/vnd.github.v3+json",
+            "Authorization": f"token {self.configuration.token}",
+        }
+        try:
+            async with async_timeout.timeout(20):
+                response = await self.github_session.get(
+                    url, headers=headers, params={"recursive": "1"}
+                )
+                if response.status != 200:
+                    self.logger.debug(f"Got {response.status} for the tree of {ref}")
+                    return None
+                content = await response.json()
+        except Exception as exception:  # pylint: disable=broad-except
+            self.logger.debug(f"[{exception}] Could not get the tree of {ref}")
+            return None
+
+        if content.get("truncated"):
+            self.logger.debug(f"The tree of {full_name} is truncated")
+            return None
+
+        tree = self.trees.get(content["sha"])
+        if tree is None or (tree.full_name, tree.ref) != (full_name, ref):
+            tree = RepositoryTree(full_name, ref, content["sha"], content["tree"])
+            self.trees[tree.sha] = tree
+        self.trees.move_to_end(tree.sha)
+        while len(self.trees) > TREE_CACHE_SIZE:
+            self.trees.popitem(last=False)
+        return tree
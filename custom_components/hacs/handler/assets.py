@@ -0,0 +1,206 @@
+"""In-memory index of the plugin files served to Lovelace."""
+import hashlib
+import mimetypes
+import os
+from stat import S_ISREG
+
+import aiofiles
+from aiohttp import web
+from integrationhelper import Logger
+
+from ..hacsbase import Hacs
+from .compress import EXTENSIONS, load_index
+
+# Most preferred first, with the suffix of the variant on disk.
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+CHUNK_SIZE = 64 * 1024
+# Variants and leftovers that are not served on their own.
+SKIP = (".gz", ".br", ".tmp")
+
+
+class Asset:
+    """A file, and its compressed variants."""
+
+    __slots__ = ("path", "version", "mtime_ns", "size", "content_type", "variants")
+
+    def __init__(self, path, version, stat, variants):
+        """Initialize."""
+        self.path = path
+        self.version = version
+        self.mtime_ns = stat.st_mtime_ns
+        self.size = stat.st_size
+        self.content_type = (
+            mimetypes.guess_type(path)[0] or "application/octet-stream"
+        )
+        self.variants = variants
+
+    def etag(self, encoding):
+        """Return the strong ETag of one representation."""
+        if encoding == "identity":
+            return f'"{self.version}"'
+        return f'"{self.version}-{encoding}"'
+
+    def changed(self, stat):
+        """Return a bool if the file on disk is not the one that was hashed."""
+        return (self.mtime_ns, self.size) != (stat.st_mtime_ns, stat.st_size)
+
+
+def build_asset(path, compressed=None):
+    """Return an Asset for path, hashing its content.
+
+    compressed is the hash of the source the .gz and .br variants were
+    made from, the variants are only used if the source still matches.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as infile:
+        stat = os.fstat(infile.fileno())
+        for chunk in iter(lambda: infile.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    variants = {"identity": path}
+    if path.endswith(EXTENSIONS) and compressed == digest.hexdigest():
+        for encoding, suffix in ENCODINGS:
+            if os.path.isfile(path + suffix):
+                variants[encoding] = path + suffix
+    return Asset(path, digest.hexdigest()[:16], stat, variants)
+
+
+def stat_file(path):
+    """Return the stat of a regular file, or None."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat if S_ISREG(stat.st_mode) else None
+
+
+def accepted_encodings(header):
+    """Return the encodings the client accepts, from Accept-Encoding."""
+    accepted = set()
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name and quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+class HacsAssetIndex(Hacs):
+    """Files in www/community, with hashes and compressed variants."""
+
+    def __init__(self):
+        """Initialize."""
+        self.logger = Logger("hacs.assets")
+        self.assets = {}
+
+    @property
+    def root(self):
+        """Return the directory that is served."""
+        return f"{self.system.config_path}/www/community"
+
+    def scan(self, directory=None):
+        """(Re)index the files under directory (default the root)."""
+        directory = directory or self.root
+        prefix = os.path.relpath(directory, self.root)
+        prefix = "" if prefix == "." else f"{prefix}/"
+        index = load_index(self.root)
+        assets = {}
+        for path, _, files in os.walk(directory):
+            for filename in files:
+                if filename.startswith(".") or filename.endswith(SKIP):
+                    continue
+                location = os.path.join(path, filename)
+                relative = os.path.relpath(location, self.root)
+                try:
+                    assets[relative] = build_asset(location, index.get(relative))
+                except OSError as exception:
+                    self.logger.debug(f"Could not index {location} - {exception}")
+        for key in [x for x in self.assets if x.startswith(prefix)]:
+            if key not in assets:
+                del self.assets[key]
+        self.assets.update(assets)
+        return len(assets)
+
+    def build(self, requested_file):
+        """Return an Asset for a file under the root."""
+        return build_asset(
+            f"{self.root}/{requested_file}", load_index(self.root).get(requested_file)
+        )
+
+    async def async_scan(self, directory=None):
+        """Index the files under directory, in the executor."""
+        count = await self.hass.async_add_executor_job(self.scan, directory)
+        self.logger.debug(f"Indexed {count} files in {directory or self.root}")
+
+    def version(self, requested_file):
+        """Return the content hash of an indexed file, or None."""
+        asset = self.assets.get(requested_file)
+        if asset is None:
+            return None
+        return asset.version
+
+    async def async_get(self, requested_file):
+        """Return the Asset for a requested file, or None.
+
+        The file is hashed again if it changed on disk since it was indexed,
+        or indexed now if it was added outside of HACS.
+        """
+        requested_file = os.path.normpath(requested_file)
+        if requested_file.startswith("..") or os.path.isabs(requested_file):
+            return None
+        path = f"{self.root}/{requested_file}"
+        stat = await self.hass.async_add_executor_job(stat_file, path)
+        if stat is None:
+            self.assets.pop(requested_file, None)
+            return None
+        asset = self.assets.get(requested_file)
+        if asset is not None and not asset.changed(stat):
+            return asset
+        asset = await self.hass.async_add_executor_job(self.build, requested_file)
+        self.assets[requested_file] = asset
+        return asset
+
+    async def response(self, request, asset):
+        """Serve an asset, negotiating the encoding."""
+        accepted = accepted_encodings(request.headers.get("Accept-Encoding"))
+        encoding = "identity"
+        for candidate, _ in ENCODINGS:
+            if candidate in accepted and candidate in asset.variants:
+                encoding = candidate
+                break
+        path = asset.variants[encoding]
+        etag = asset.etag(encoding)
+
+        headers = {
+            "ETag": etag,
+            "Vary": "Accept-Encoding",
+            "Cache-Control": REVALIDATE,
+        }
+        if request.query.get("v") == asset.version:
+            headers["Cache-Control"] = IMMUTABLE
+
+        if_none_match = request.headers.get("If-None-Match", "")
+        if etag in [x.strip() for x in if_none_match.split(",")]:
+            return web.Response(status=304, headers=headers)
+
+        headers["Content-Type"] = asset.content_type
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        response = web.StreamResponse(headers=headers)
+        async with aiofiles.open(path, mode="rb") as infile:
+            response.content_length = os.fstat(infile.fileno()).st_size
+            await response.prepare(request)
+            while True:
+                chunk = await infile.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                await response.write(chunk)
+        await response.write_eof()
+        return response
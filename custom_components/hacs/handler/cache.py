@@ -0,0 +1,177 @@
+"""Conditional request cache for the GitHub API."""
+import json
+from collections import OrderedDict
+
+from multidict import CIMultiDict
+from integrationhelper import Logger
+
+CACHE_SIZE = 5000
+# Characters of response bodies kept in memory, and the largest body cached
+CACHE_BYTES = 32 * 1024 * 1024
+MAX_BODY_SIZE = 1024 * 1024
+# Characters of response bodies that are kept when the cache is stored
+PERSIST_SIZE = 4 * 1024 * 1024
+
+
+class CachedResponse:
+    """Response served from the cache after a 304."""
+
+    def __init__(self, body, headers):
+        """Initialize."""
+        self.status = 200
+        self.headers = headers
+        self._body = body
+
+    async def read(self):
+        """Return the body as bytes."""
+        return self._body.encode("utf-8")
+
+    async def text(self, *args, **kwargs):  # pylint: disable=unused-argument
+        """Return the body as text."""
+        return self._body
+
+    async def json(self, *args, **kwargs):  # pylint: disable=unused-argument
+        """Return the body as json."""
+        return json.loads(self._body)
+
+    def release(self):
+        """Nothing to release."""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.release()
+
+
+class _RequestContext:
+    """Make a request both awaitable and usable with 'async with'."""
+
+    def __init__(self, coro):
+        """Initialize."""
+        self._coro = coro
+        self._response = None
+
+    def __await__(self):
+        return self._coro.__await__()
+
+    async def __aenter__(self):
+        self._response = await self._coro
+        return self._response
+
+    async def __aexit__(self, *args):
+        self._response.release()
+
+
+class HacsCachedSession:
+    """ClientSession wrapper that sends conditional GET requests.
+
+    GitHub does not count 304 responses against the rate limit, so
+    unchanged resources are served from the cache for free.
+    """
+
+    def __init__(self, session):
+        """Initialize."""
+        self.logger = Logger("hacs.cache")
+        self.session = session
+        self.entries = OrderedDict()
+        self.size = 0
+        self.dirty = False
+
+    def __getattr__(self, name):
+        """Pass everything else to the real session."""
+        return getattr(self.session, name)
+
+    @staticmethod
+    def _key(url, headers, params):
+        """Return the cache key for a request."""
+        accept = (headers or {}).get("Accept", "")
+        params = "&".join(f"{k}={v}" for k, v in sorted((params or {}).items()))
+        return f"{accept} {url}?{params}"
+
+    def load(self, content):
+        """Load stored entries."""
+        if not content:
+            return
+        for key, entry in (content.get("data") or {}).items():
+            self.store(key, entry)
+        self.dirty = False
+
+    def store(self, key, entry):
+        """Add an entry, and evict the least recently used to stay in limits."""
+        self.discard(key)
+        self.entries[key] = entry
+        self.size += len(entry["body"])
+        while len(self.entries) > CACHE_SIZE or self.size > CACHE_BYTES:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted["body"])
+        self.dirty = True
+
+    def discard(self, key):
+        """Remove an entry, if it is cached."""
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry["body"])
+            self.dirty = True
+
+    def dump(self):
+        """Return the most recently used entries that fit in PERSIST_SIZE."""
+        self.dirty = False
+        entries = []
+        left = PERSIST_SIZE
+        for key, entry in reversed(self.entries.items()):
+            size = len(entry["body"])
+            if size > left:
+                continue
+            left -= size
+            entries.append((key, entry))
+        return dict(reversed(entries))
+
+    def get(self, url, headers=None, params=None, **kwargs):
+        """Conditional GET request."""
+        return _RequestContext(self._get(url, headers, params, **kwargs))
+
+    async def _get(self, url, headers, params, **kwargs):
+        """Send the request, and serve it from the cache on 304."""
+        key = self._key(url, headers, params)
+        entry = self.entries.get(key)
+        headers = dict(headers or {})
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = await self.session.get(url, headers=headers, params=params, **kwargs)
+
+        if response.status == 304 and entry is not None:
+            self.entries.move_to_end(key)
+            cached = CIMultiDict(entry["headers"])
+            cached.update(response.headers)
+            response.release()
+            self.logger.debug(f"Served {url} from cache")
+            return CachedResponse(entry["body"], cached)
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if response.status == 200 and (etag or last_modified):
+            try:
+                body = (await response.read()).decode("utf-8")
+            except UnicodeDecodeError:
+                return response
+            if len(body) > MAX_BODY_SIZE:
+                # Large bodies, like big recursive trees, are not kept.
+                self.discard(key)
+                return response
+            self.store(
+                key,
+                {
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "headers": {
+                        "Content-Type": response.headers.get("Content-Type", "")
+                    },
+                    "body": body,
+                },
+            )
+        return response
@@ -0,0 +1,165 @@
+"""Precompressed .gz and .br variants of plugin files.
+
+Run as a module to compress a whole tree:
+python -m custom_components.hacs.handler.compress /config/www/community
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, .gz is always written.
+    brotli = None
+
+EXTENSIONS = (".js", ".css")
+INDEX = ".precompress.json"
+WORKERS = min(4, os.cpu_count() or 1)
+
+_POOL = None
+
+
+def get_pool():
+    """Return the process pool, it is created on first use.
+
+    Workers are spawned, forking the threaded Home Assistant process can
+    leave locks held in the children.
+    """
+    global _POOL  # pylint: disable=global-statement
+    if _POOL is None:
+        _POOL = ProcessPoolExecutor(
+            max_workers=WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _POOL
+
+
+def shutdown_pool(_=None):
+    """Stop the process pool, if it was started."""
+    global _POOL  # pylint: disable=global-statement
+    if _POOL is not None:
+        _POOL.shutdown()
+        _POOL = None
+
+
+def write_atomic(path, content):
+    """Write content to path through a temporary file."""
+    with open(f"{path}.tmp", "wb") as outfile:
+        outfile.write(content)
+    os.replace(f"{path}.tmp", path)
+
+
+def variants(path):
+    """Return the compressed variants of path."""
+    if brotli is None:
+        return [f"{path}.gz"]
+    return [f"{path}.gz", f"{path}.br"]
+
+
+def compress_file(path, known=None):
+    """Write the compressed variants of path, and return its hash.
+
+    Nothing is written if the hash is known and the variants exist.
+    """
+    with open(path, "rb") as infile:
+        content = infile.read()
+    digest = hashlib.sha256(content).hexdigest()
+    if digest == known and all(os.path.exists(x) for x in variants(path)):
+        return digest
+    write_atomic(f"{path}.gz", gzip.compress(content, 9))
+    if brotli is not None:
+        write_atomic(f"{path}.br", brotli.compress(content, quality=11))
+    return digest
+
+
+def sources(directory):
+    """Return the files under directory that should be compressed."""
+    found = []
+    for path, _, files in os.walk(directory):
+        for filename in files:
+            if filename.endswith(EXTENSIONS):
+                found.append(os.path.join(path, filename))
+    return sorted(found)
+
+
+def load_index(root):
+    """Return {relative path: hash} of the files compressed under root."""
+    try:
+        with open(os.path.join(root, INDEX), "r", encoding="utf-8") as indexfile:
+            return json.load(indexfile)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_index(root, index):
+    """Store the index for root."""
+    write_atomic(os.path.join(root, INDEX), json.dumps(index).encode("utf-8"))
+
+
+def update_index(root, index, paths, results):
+    """Put the results in the index, return the number of failures."""
+    failed = 0
+    for path, result in zip(paths, results):
+        relative = os.path.relpath(path, root)
+        if isinstance(result, Exception):
+            index.pop(relative, None)
+            failed += 1
+            continue
+        index[relative] = result
+    # Forget files that are gone.
+    for relative in list(index):
+        if not os.path.exists(os.path.join(root, relative)):
+            del index[relative]
+    return failed
+
+
+async def async_precompress(hass, root, directory=None):
+    """Compress the files under directory (default root) in the process pool."""
+    paths = await hass.async_add_executor_job(sources, directory or root)
+    if not paths:
+        return 0
+    index = await hass.async_add_executor_job(load_index, root)
+    pool = get_pool()
+    results = await asyncio.gather(
+        *[
+            hass.loop.run_in_executor(
+                pool, compress_file, path, index.get(os.path.relpath(path, root))
+            )
+            for path in paths
+        ],
+        return_exceptions=True,
+    )
+    failed = update_index(root, index, paths, results)
+    await hass.async_add_executor_job(save_index, root, index)
+    return len(paths) - failed
+
+
+def precompress(root):
+    """Compress every file under root in parallel, return the number processed."""
+    paths = sources(root)
+    index = load_index(root)
+    known = [index.get(os.path.relpath(path, root)) for path in paths]
+    results = []
+    with ProcessPoolExecutor(max_workers=WORKERS) as pool:
+        for future in [
+            pool.submit(compress_file, path, hashed)
+            for path, hashed in zip(paths, known)
+        ]:
+            try:
+                results.append(future.result())
+            except Exception as exception:  # pylint: disable=broad-except
+                results.append(exception)
+    failed = update_index(root, index, paths, results)
+    save_index(root, index)
+    return len(paths) - failed
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("usage: python -m custom_components.hacs.handler.compress <directory>")
+        sys.exit(1)
+    print(f"Processed {precompress(sys.argv[1])} files")
@@ -1,7 +1,9 @@
 """Download."""
 import os
-import gzip
+import hashlib
 import shutil
+import tarfile
+import tempfile
 
 import aiofiles
 import async_timeout
@@ -12,67 +14,112 @@ from ..hacsbase.exceptions import HacsNotSoBasicException
 
 
 @backoff.on_exception(backoff.expo, Exception, max_tries=5)
-async def async_download_file(hass, url):
+async def async_download_to_file(hass, url, location, sha=None, size=None):
     """
-    Download files, and return the content.
+    Stream a file to disk, and return the location.
+
+    With size, the git blob sha of the content is computed while it is
+    written and checked against sha.
     """
-    logger = Logger("hacs.download.downloader")
+    logger = Logger("hacs.download.stream")
     if url is None:
         return
 
-    # There is a bug somewhere... TODO: Find that bug....
-    if "tags/" in url:
-        url = url.replace("tags/", "")
-
     logger.debug(f"Donwloading {url}")
 
-    result = None
+    digest = hashlib.sha1()
+    if size is not None:
+        digest.update(f"blob {size}\0".encode())
+    written = 0
 
-    with async_timeout.timeout(5, loop=hass.loop):
-        request = await async_get_clientsession(hass).get(url)
+    try:
+        with async_timeout.timeout(60, loop=hass.loop):
+            request = await async_get_clientsession(hass).get(url)
+            if request.status != 200:
+                raise HacsNotSoBasicException(
+                    f"Got status code {request.status} when trying to download {url}"
+                )
+            async with aiofiles.open(f"{location}.tmp", mode="wb") as outfile:
+                async for chunk in request.content.iter_chunked(64 * 1024):
+                    written += len(chunk)
+                    digest.update(chunk)
+                    await outfile.write(chunk)
 
-        # Make sure that we got a valid result
-        if request.status == 200:
-            result = await request.read()
-        else:
+        if size is not None and written != size:
             raise HacsNotSoBasicException(
-                "Got status code {} when trying to download {}".format(
-                    request.status, url
-                )
+                f"Got {written} bytes, expected {size} for {url}"
             )
+        if size is not None and sha is not None and digest.hexdigest() != sha:
+            raise HacsNotSoBasicException(f"Checksum mismatch for {url}")
+
+        os.replace(f"{location}.tmp", location)
+    finally:
+        if os.path.exists(f"{location}.tmp"):
+            os.remove(f"{location}.tmp")
+
+    return location
+
+
+def blob_sha(path):
+    """Return the git blob sha of a file, or None if it can not be read."""
+    try:
+        digest = hashlib.sha1(f"blob {os.path.getsize(path)}\0".encode())
+        with open(path, "rb") as infile:
+            for chunk in iter(lambda: infile.read(64 * 1024), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
 
-    return result
 
+def blob_shas(directory, paths):
+    """Return {path: git blob sha or None} for files under directory."""
+    return {path: blob_sha(f"{directory}/{path}") for path in paths}
 
-async def async_save_file(location, content):
-    """Save files."""
-    logger = Logger("hacs.download.save")
-    logger.debug(f"Saving {location}")
-    mode = "w"
-    encoding = "utf-8"
-    errors = "ignore"
 
-    if not isinstance(content, str):
-        mode = "wb"
-        encoding = None
-        errors = None
+async def async_download_archive(hass, url, token):
+    """
+    Download an archive to a temporary file, and return the path.
+    """
+    logger = Logger("hacs.download.archive")
+    logger.debug(f"Donwloading {url}")
 
+    headers = {"Authorization": f"token {token}"}
+    handle, path = tempfile.mkstemp(suffix=".tar.gz")
+    os.close(handle)
     try:
-        async with aiofiles.open(
-            location, mode=mode, encoding=encoding, errors=errors
-        ) as outfile:
-            await outfile.write(content)
-            outfile.close()
-
-        # Create gz for .js files
-        if os.path.isfile(location):
-            if location.endswith(".js") or location.endswith(".css"):
-                with open(location, "rb") as f_in:
-                    with gzip.open(location + ".gz", "wb") as f_out:
-                        shutil.copyfileobj(f_in, f_out)
-
-    except Exception as error:  # pylint: disable=broad-except
-        msg = "Could not write data to {} - {}".format(location, error)
-        logger.debug(msg)
-
-    return os.path.exists(location)
+        with async_timeout.timeout(60, loop=hass.loop):
+            request = await async_get_clientsession(hass).get(url, headers=headers)
+            if request.status != 200:
+                raise HacsNotSoBasicException(
+                    f"Got status code {request.status} when trying to download {url}"
+                )
+            async with aiofiles.open(path, mode="wb") as outfile:
+                async for chunk in request.content.iter_chunked(64 * 1024):
+                    await outfile.write(chunk)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+
+def extract_archive(archive, target):
+    """Extract files from a tar.gz archive in one pass.
+
+    target returns the local path for a member name, or None to skip it.
+    Returns the extracted paths.
+    """
+    extracted = []
+    with tarfile.open(archive, mode="r|gz") as tar:
+        for member in tar:
+            if not member.isfile() or ".." in member.name.split("/"):
+                continue
+            location = target(member.name)
+            if location is None:
+                continue
+            os.makedirs(os.path.dirname(location), exist_ok=True)
+            with tar.extractfile(member) as f_in:
+                with open(location, "wb") as f_out:
+                    shutil.copyfileobj(f_in, f_out)
+            extracted.append(location)
+    return extracted
@@ -17,11 +17,11 @@ def render_template(content, context):
         render = Template(content)
         render = render.render(
             installed=context.status.installed,
-            pending_update=context.pending_upgrade,
+            pending_update=context.view.pending_upgrade,
             prerelease=prerelease,
             selected_tag=context.status.selected_tag,
             version_available=context.releases.last_release,
-            version_installed=context.display_installed_version,
+            version_installed=context.view.installed_version,
         )
         return render
     except Exception as exception:
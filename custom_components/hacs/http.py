@@ -2,7 +2,7 @@
 import os
 from time import time
 from homeassistant.components.http import HomeAssistantView
-from jinja2 import Environment, PackageLoader
+from jinja2 import Environment, FileSystemBytecodeCache, PackageLoader
 from aiohttp import web
 
 from integrationhelper import Logger
@@ -11,6 +11,34 @@ from .hacsbase import Hacs
 
 
 WEBRESPONSE = {}
+ENVIRONMENT = None
+
+
+def get_environment(bytecode_cache=None):
+    """Return the template environment, it is shared by all renders."""
+    global ENVIRONMENT  # pylint: disable=global-statement
+    if ENVIRONMENT is None or bytecode_cache is not None:
+        ENVIRONMENT = Environment(
+            loader=PackageLoader("custom_components.hacs.frontend"),
+            bytecode_cache=bytecode_cache,
+            auto_reload=False,
+        )
+    return ENVIRONMENT
+
+
+def precompile_templates(cache_directory):
+    """Compile all templates, using an on-disk bytecode cache."""
+    try:
+        os.makedirs(cache_directory, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(cache_directory)
+    except OSError:
+        # Compile in memory only.
+        bytecode_cache = None
+    environment = get_environment(bytecode_cache)
+    templates = environment.list_templates(extensions=["html"])
+    for template in templates:
+        environment.get_template(template)
+    return len(templates)
 
 
 def webresponse(classname):
@@ -72,8 +100,7 @@ class HacsWebResponse(HomeAssistantView, Hacs):
 
     def render(self, templatefile, location=None, repository=None, message=None):
         """Render a template file."""
-        loader = Environment(loader=PackageLoader("custom_components.hacs.frontend"))
-        template = loader.get_template(templatefile + ".html")
+        template = get_environment().get_template(templatefile + ".html")
         return template.render(
             {
                 "hacs": self,
@@ -101,19 +128,14 @@ class HacsPluginView(HacsWebResponse):
             if "?" in requested_file:
                 requested_file = requested_file.split("?")[0]
 
-            file = f"{self.system.config_path}/www/community/{requested_file}"
-
-            # Serve .gz if it exist
-            if os.path.exists(file + ".gz"):
-                file += ".gz"
-
-            response = None
-            if os.path.exists(file):
-                self.logger.debug("Serving {} from {}".format(requested_file, file))
-                response = web.FileResponse(file)
-                response.headers["Cache-Control"] = "max-age=0, must-revalidate"
+            asset = await self.asset_index.async_get(requested_file)
+            if asset is not None:
+                self.logger.debug(f"Serving {requested_file} from {asset.path}")
+                response = await self.asset_index.response(request, asset)
             else:
-                self.logger.error(f"Tried to serve up '{file}' but it does not exist")
+                self.logger.error(
+                    f"Tried to serve up '{requested_file}' but it does not exist"
+                )
                 response = web.Response(status=404)
 
         except Exception as error:  # pylint: disable=broad-except
@@ -204,11 +226,9 @@ class Repository(HacsWebResponse):
             self.logger.error(f"No repository found with ID {str(self.repository_id)}")
             return web.Response(status=404)
 
+        # Serve what is stored, the page reloads when the refresh is done.
         if not repository.status.updated_info:
-            await repository.update_repository()
-            repository.status.updated_info = True
-
-            self.data.write()
+            repository.refresh_in_background()
 
         if repository.status.new:
             repository.status.new = False
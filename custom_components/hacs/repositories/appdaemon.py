@@ -25,15 +25,13 @@ class HacsAppdaemon(HacsRepository):
         await self.common_validate()
 
         # Custom step 1: Validate content.
-        addir = await self.repository_object.get_contents("apps", self.ref)
+        addir = await self.list_contents("apps")
         if not isinstance(addir, list):
             self.validate.errors.append("Repostitory structure not compliant")
 
         self.content.path.remote = addir[0].path
         self.information.name = addir[0].name
-        self.content.objects = await self.repository_object.get_contents(
-            self.content.path.remote, self.ref
-        )
+        self.content.objects = await self.list_contents(self.content.path.remote)
 
         self.content.files = []
         for filename in self.content.objects:
@@ -57,17 +55,16 @@ class HacsAppdaemon(HacsRepository):
         # Set local path
         self.content.path.local = self.localpath
 
-    async def update_repository(self):
+    async def update_repository(self, delta=False):
         """Update."""
-        await self.common_update()
+        if not await self.common_update(delta):
+            return
 
         # Get appdaemon objects.
-        addir = await self.repository_object.get_contents("apps", self.ref)
+        addir = await self.list_contents("apps")
         self.content.path.remote = addir[0].path
         self.information.name = addir[0].name
-        self.content.objects = await self.repository_object.get_contents(
-            self.content.path.remote, self.ref
-        )
+        self.content.objects = await self.list_contents(self.content.path.remote)
 
         self.content.files = []
         for filename in self.content.objects:
@@ -44,14 +44,12 @@ class HacsIntegration(HacsRepository):
             )
 
         # Custom step 1: Validate content.
-        ccdir = await self.repository_object.get_contents("custom_components", self.ref)
+        ccdir = await self.list_contents("custom_components")
         if not isinstance(ccdir, list):
             self.validate.errors.append("Repostitory structure not compliant")
 
         self.content.path.remote = ccdir[0].path
-        self.content.objects = await self.repository_object.get_contents(
-            self.content.path.remote, self.ref
-        )
+        self.content.objects = await self.list_contents(self.content.path.remote)
 
         self.content.files = []
         for filename in self.content.objects:
@@ -81,16 +79,15 @@ class HacsIntegration(HacsRepository):
         # Set local path
         self.content.path.local = self.localpath
 
-    async def update_repository(self):
+    async def update_repository(self, delta=False):
         """Update."""
-        await self.common_update()
+        if not await self.common_update(delta):
+            return
 
         # Get integration objects.
-        ccdir = await self.repository_object.get_contents("custom_components", self.ref)
+        ccdir = await self.list_contents("custom_components")
         self.content.path.remote = ccdir[0].path
-        self.content.objects = await self.repository_object.get_contents(
-            self.content.path.remote, self.ref
-        )
+        self.content.objects = await self.list_contents(self.content.path.remote)
 
         self.content.files = []
         for filename in self.content.objects:
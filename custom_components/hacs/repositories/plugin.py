@@ -21,6 +21,28 @@ class HacsPlugin(HacsRepository):
             f"{self.system.config_path}/www/community/{full_name.split('/')[-1]}"
         )
 
+    @property
+    def resource_url(self):
+        """Return the Lovelace resource URL.
+
+        This goes into the user's configuration, which is not updated on
+        upgrades, so it is not versioned and is revalidated with the ETag.
+        """
+        name = self.information.full_name.split("/")[-1]
+        return f"/community_plugin/{name}/{self.information.file_name}"
+
+    @property
+    def versioned_resource_url(self):
+        """Return the resource URL with the content hash, for links HACS renders."""
+        url = self.resource_url
+        if not self.status.installed or self.asset_index is None:
+            return url
+        name = self.information.full_name.split("/")[-1]
+        version = self.asset_index.version(f"{name}/{self.information.file_name}")
+        if version is None:
+            return url
+        return f"{url}?v={version}"
+
     async def validate_repository(self):
         """Validate."""
         # Run common validation steps.
@@ -54,12 +76,16 @@ class HacsPlugin(HacsRepository):
         # Run common registration steps.
         await self.common_registration()
 
-    async def update_repository(self):
+    async def update_repository(self, delta=False):
         """Update."""
         # Run common update steps.
-        await self.common_update()
+        if not await self.common_update(delta):
+            return
 
-        # Get plugin objects.
+        # Get plugin objects, from the known location if they were released.
+        if not self.content.objects and self.content.path.remote is not None:
+            if not await self.get_plugin_objects():
+                self.content.path.remote = None
         await self.get_plugin_location()
 
         # Get JS type
@@ -75,6 +101,28 @@ class HacsPlugin(HacsRepository):
         for filename in self.content.objects:
             self.content.files.append(filename.name)
 
+    async def get_plugin_objects(self):
+        """Get the objects at the known location, returns False if it moved."""
+        location = self.content.path.remote
+        try:
+            if location == "release":
+                release = self.releases.last_release_object
+                if release is None or release.assets is None:
+                    # Prefetched releases do not have the assets.
+                    await self.get_releases()
+                    release = self.releases.last_release_object
+                objects = []
+                if release is not None and release.assets is not None:
+                    objects = release.assets
+            else:
+                objects = await self.list_contents(location)
+        except AIOGitHubException:
+            return False
+        if self.information.file_name not in [x.name for x in objects]:
+            return False
+        self.content.objects = objects
+        return True
+
     async def get_plugin_location(self):
         """Get plugin location."""
         if self.content.path.remote is not None:
@@ -89,9 +137,7 @@ class HacsPlugin(HacsRepository):
                 files = []
                 if location != "release":
                     try:
-                        objects = await self.repository_object.get_contents(
-                            location, self.ref
-                        )
+                        objects = await self.list_contents(location)
                     except AIOGitHubException:
                         continue
                 else:
@@ -138,7 +184,7 @@ class HacsPlugin(HacsRepository):
         """Parse the readme looking for js type."""
         readme = None
         readme_files = ["readme", "readme.md"]
-        root = await self.repository_object.get_contents("")
+        root = await self.list_contents("")
         for file in root:
             if file.name.lower() in readme_files:
                 readme = await self.repository_object.get_contents(file.name)
@@ -1,14 +1,26 @@
 """Repository."""
 # pylint: disable=broad-except, bad-continuation, no-member
+import asyncio
+import os
 import pathlib
 from distutils.version import LooseVersion
 from integrationhelper import Validate, Logger
 from ..hacsbase import Hacs
-from ..hacsbase.backup import Backup
-from ..handler.download import async_download_file, async_save_file
+from ..hacsbase.backup import Backup, BackupFiles
+from ..hacsbase.const import ARCHIVE_FILE_COST, DOWNLOAD_CONCURRENCY
+from ..hacsbase.tree import TreeEntry
+from ..handler.compress import EXTENSIONS, async_precompress, variants
+from ..handler.download import (
+    async_download_archive,
+    async_download_to_file,
+    blob_shas,
+    extract_archive,
+)
 
 
 RERPOSITORY_CLASSES = {}
+# In-flight background refreshes, by repository uid.
+REFRESHES = {}
 
 
 def register_repository_class(cls):
@@ -17,74 +29,223 @@ def register_repository_class(cls):
     return cls
 
 
+def set_and_track(helper, name, value):
+    """Set an attribute, and count the change.
+
+    The sorted views are dropped when the attribute is part of them, and
+    the repository is indexed again if the attribute is searchable.
+    """
+    if name == "full_name" and Hacs.search is not None:
+        # Renamed, the entry under the old name has to go as well.
+        Hacs.search.mark(getattr(helper, "full_name", None))
+    object.__setattr__(helper, name, value)
+    object.__setattr__(helper, "revision", getattr(helper, "revision", 0) + 1)
+    if name in helper.view_fields:
+        Hacs.repositories.invalidate_views()
+    if name in helper.search_fields and Hacs.search is not None:
+        Hacs.search.mark(getattr(helper, "full_name", None))
+
+
 class RepositoryVersions:
     """Versions."""
 
-    available = None
-    available_commit = None
-    installed = None
-    installed_commit = None
+    view_fields = ()
+    search_fields = ()
+    __setattr__ = set_and_track
+
+    __slots__ = (
+        "revision",
+        "available",
+        "available_commit",
+        "installed",
+        "installed_commit",
+        "installed_files",
+    )
+
+    def __init__(self):
+        """Initialize."""
+        self.available = None
+        self.available_commit = None
+        self.installed = None
+        self.installed_commit = None
+        self.installed_files = {}
 
 
 class RepositoryStatus:
     """Repository status."""
 
-    hide = False
-    installed = False
-    last_updated = None
-    new = True
-    selected_tag = None
-    show_beta = False
-    track = True
-    updated_info = False
-    first_install = True
+    view_fields = ("hide", "installed", "new")
+    search_fields = ()
+    __setattr__ = set_and_track
+
+    __slots__ = (
+        "revision",
+        "hide",
+        "installed",
+        "new",
+        "selected_tag",
+        "show_beta",
+        "updated_info",
+        "first_install",
+        "refresh_steps",
+    )
+
+    def __init__(self):
+        """Initialize."""
+        self.hide = False
+        self.installed = False
+        self.new = True
+        self.selected_tag = None
+        self.show_beta = False
+        self.updated_info = False
+        self.first_install = True
+        self.refresh_steps = {}
 
 
 class RepositoryInformation:
     """RepositoryInformation."""
 
-    additional_info = None
-    authors = []
-    category = None
-    default_branch = None
-    description = ""
-    full_name = None
-    homeassistant_version = None
-    last_updated = None
-    uid = None
-    info = None
-    name = None
-    topics = []
+    view_fields = ("category", "full_name", "name")
+    search_fields = ("authors", "description", "full_name", "name", "topics")
+    __setattr__ = set_and_track
+
+    __slots__ = (
+        "revision",
+        "additional_info",
+        "authors",
+        "category",
+        "default_branch",
+        "description",
+        "file_name",
+        "full_name",
+        "homeassistant_version",
+        "javascript_type",
+        "last_updated",
+        "uid",
+        "name",
+        "stars",
+        "topics",
+    )
+
+    def __init__(self):
+        """Initialize."""
+        self.additional_info = None
+        self.authors = []
+        self.category = None
+        self.default_branch = None
+        self.description = ""
+        self.file_name = None
+        self.full_name = None
+        self.homeassistant_version = None
+        self.javascript_type = None
+        self.last_updated = None
+        self.uid = None
+        self.name = None
+        self.stars = 0
+        self.topics = []
 
 
 class RepositoryReleases:
     """RepositoyReleases."""
 
-    last_release = None
-    last_release_object = None
-    published_tags = []
-    releases = False
+    view_fields = ()
+    search_fields = ()
+    __setattr__ = set_and_track
+
+    __slots__ = (
+        "revision",
+        "last_release",
+        "last_release_object",
+        "published_tags",
+        "releases",
+    )
+
+    def __init__(self):
+        """Initialize."""
+        self.last_release = None
+        self.last_release_object = None
+        self.published_tags = []
+        self.releases = False
 
 
 class RepositoryPath:
     """RepositoryPath."""
 
-    local = None
-    remote = None
+    __slots__ = ("local", "remote")
+
+    def __init__(self):
+        """Initialize."""
+        self.local = None
+        self.remote = None
 
 
 class RepositoryContent:
     """RepositoryContent."""
 
-    path = None
-    files = []
-    objects = []
-    single = False
+    __slots__ = ("path", "files", "objects", "single")
+
+    def __init__(self):
+        """Initialize."""
+        self.path = None
+        self.files = []
+        self.objects = []
+        self.single = False
+
+
+def stargazers(repository_object):
+    """Return the number of stars of a repository object."""
+    return (getattr(repository_object, "attributes", None) or {}).get(
+        "stargazers_count", 0
+    )
+
+
+class RepositoryView:
+    """Snapshot of the display properties of a repository."""
+
+    __slots__ = (
+        "key",
+        "name",
+        "status",
+        "status_description",
+        "installed_version",
+        "available_version",
+        "version_or_commit",
+        "pending_upgrade",
+        "main_action",
+        "custom",
+        "can_install",
+    )
+
+    def __init__(self, repository, key):
+        """Initialize."""
+        self.key = key
+        self.name = repository.display_name
+        self.status = repository.display_status
+        self.status_description = repository.display_status_description
+        self.installed_version = repository.display_installed_version
+        self.available_version = repository.display_available_version
+        self.version_or_commit = repository.display_version_or_commit
+        self.pending_upgrade = repository.pending_upgrade
+        self.main_action = repository.main_action
+        self.custom = repository.custom
+        self.can_install = repository.can_install
 
 
 class HacsRepository(Hacs):
     """HacsRepository."""
 
+    revision = 0
+    # The display name of integrations comes from the manifest.
+    view_fields = ("manifest",)
+
+    def __setattr__(self, name, value):
+        """Set an attribute, and count the change."""
+        object.__setattr__(self, name, value)
+        if name not in ("revision", "_view"):
+            object.__setattr__(self, "revision", self.revision + 1)
+        if name in self.view_fields:
+            self.repositories.invalidate_views()
+
     def __init__(self):
         """Set up HacsRepository."""
 
@@ -92,12 +253,31 @@ class HacsRepository(Hacs):
         self.content.path = RepositoryPath()
         self.information = RepositoryInformation()
         self.repository_object = None
+        self.tree = None
         self.status = RepositoryStatus()
         self.validate = Validate()
         self.releases = RepositoryReleases()
         self.versions = RepositoryVersions()
         self.pending_restart = False
         self.logger = None
+        self.lock = asyncio.Lock()
+        self._view = None
+
+    @property
+    def view(self):
+        """Return the display properties, computed again after a change."""
+        key = (
+            self.revision,
+            self.information.revision,
+            self.status.revision,
+            self.versions.revision,
+            self.releases.revision,
+            len(self.common.default),
+            self.system.ha_version,
+        )
+        if self._view is None or self._view.key != key:
+            self._view = RepositoryView(self, key)
+        return self._view
 
     @property
     def pending_upgrade(self):
@@ -124,14 +304,7 @@ class HacsRepository(Hacs):
     @property
     def custom(self):
         """Return flag if the repository is custom."""
-        if self.information.full_name.split("/")[0] in [
-            "custom-components",
-            "custom-cards",
-        ]:
-            return False
-        if self.information.full_name in self.common.default:
-            return False
-        return True
+        return self.is_custom(self.information.full_name)
 
     @property
     def can_install(self):
@@ -245,6 +418,19 @@ class HacsRepository(Hacs):
             f"hacs.repository.{self.information.category}.{self.information.full_name}"
         )
 
+        self.tree = None
+
+        # Step 0: Use prefetched metadata to reject early.
+        prefetched = None
+        if self.graphql is not None and self.graphql.has(self.information.full_name):
+            prefetched = self.take_prefetched()
+            if prefetched is None:
+                self.validate.errors.append("Repository does not exist.")
+                return
+            if prefetched["archived"]:
+                self.validate.errors.append("Repository is archived.")
+                return
+
         # Step 1: Make sure the repository exist.
         self.logger.debug("Checking repository.")
         try:
@@ -271,7 +457,10 @@ class HacsRepository(Hacs):
         self.information.default_branch = self.repository_object.default_branch
 
         # Step 5: Get releases.
-        await self.get_releases()
+        if prefetched is not None:
+            await self.get_releases(prefetched["releases"])
+        else:
+            await self.get_releases()
 
         # Set repository name
         self.information.name = self.information.full_name.split("/")[1]
@@ -296,74 +485,164 @@ class HacsRepository(Hacs):
         # Set topics
         self.information.topics = self.repository_object.topics
 
+        # Set stars
+        self.information.stars = stargazers(self.repository_object)
+
         # Set description
         if self.repository_object.description:
             self.information.description = self.repository_object.description
 
-    async def common_update(self):
-        """Common information update steps of the repository."""
+    async def common_update(self, delta=False):
+        """Common information update steps of the repository.
+
+        With delta, the expensive steps are skipped if the repository has
+        not been pushed to since the last refresh, and False is returned.
+        """
         # Attach logger
         if self.logger is None:
             self.logger = Logger(
                 f"hacs.repository.{self.information.category}.{self.information.full_name}"
             )
+        steps = self.status.refresh_steps = {}
+        self.tree = None
+        prefetched = self.take_prefetched()
 
         # Attach repository
-        self.repository_object = await self.github.get_repo(self.information.full_name)
+        if prefetched is None:
+            self.repository_object = await self.github.get_repo(
+                self.information.full_name
+            )
+            prefetched = {
+                "description": self.repository_object.description,
+                "default_branch": self.repository_object.default_branch,
+                "pushed_at": self.repository_object.pushed_at,
+                "topics": self.repository_object.topics,
+                "stars": stargazers(self.repository_object),
+                "last_commit": None,
+                "releases": None,
+            }
+        else:
+            steps["metadata"] = "prefetched"
 
         # Update description
-        if self.repository_object.description:
-            self.information.description = self.repository_object.description
+        if prefetched["description"]:
+            self.information.description = prefetched["description"]
 
         # Update default branch
         if self.information.full_name != "custom-components/hacs":
-            self.information.default_branch = self.repository_object.default_branch
+            self.information.default_branch = prefetched["default_branch"]
         else:
             self.information.default_branch = "next"
 
-        # Update last available commit
-        await self.repository_object.set_last_commit()
-        self.versions.available_commit = self.repository_object.last_commit
-
         # Update last updaeted
-        self.information.last_updated = self.repository_object.pushed_at
+        pushed_at = prefetched["pushed_at"]
+        moved = pushed_at is None or pushed_at != self.information.last_updated
+        self.information.last_updated = pushed_at
 
         # Update topics
-        self.information.topics = self.repository_object.topics
+        self.information.topics = prefetched["topics"]
+
+        # Update stars
+        self.information.stars = prefetched["stars"]
+
+        if delta and not moved:
+            for step in ["last_commit", "info", "releases", "content"]:
+                steps[step] = f"skipped, not pushed to since {pushed_at}"
+            self.logger.debug(f"Skipping refresh, not pushed to since {pushed_at}")
+            return False
+
+        # The remaining steps need the repository object.
+        if steps.get("metadata") == "prefetched":
+            self.repository_object = await self.github.get_repo(
+                self.information.full_name
+            )
+
+        # Update last available commit
+        last_commit = prefetched["last_commit"]
+        if last_commit is None:
+            await self.repository_object.set_last_commit()
+            last_commit = self.repository_object.last_commit
+        commit_moved = last_commit != self.versions.available_commit
+        self.versions.available_commit = last_commit
+        steps["last_commit"] = f"taken, pushed at {pushed_at}"
 
         # Update "info.md"
-        await self.get_info_md_content()
+        if (
+            delta
+            and not commit_moved
+            and not self.releases.releases
+            and self.information.additional_info is not None
+        ):
+            steps["info"] = "skipped, last commit unchanged"
+        else:
+            await self.get_info_md_content()
+            steps["info"] = "taken"
 
         # Update releases
-        await self.get_releases()
+        await self.get_releases(prefetched["releases"])
+        steps["releases"] = "taken"
+        steps["content"] = "taken"
+        self.logger.debug(f"Refresh steps: {steps}")
+        return True
 
-    async def install(self):
-        """Common installation steps of the repository."""
+    async def install_content(self):
+        """Download the content, return the validation."""
         self.validate.errors = []
 
         await self.update_repository()
 
-        if self.status.installed and not self.content.single:
-            backup = Backup(self.content.path.local)
-            backup.create()
-
-        validate = await self.download_content(
-            self.validate, self.content.path.remote, self.content.path.local, self.ref
-        )
-
-        if validate.errors:
+        if self.status.installed and await self.upgrade_content(self.validate):
+            validate = self.validate
             for error in validate.errors:
                 self.logger.error(error)
+        else:
             if self.status.installed and not self.content.single:
-                backup.restore()
+                backup = Backup(self.content.path.local)
+                backup.create()
+
+            validate = await self.download_content(
+                self.validate,
+                self.content.path.remote,
+                self.content.path.local,
+                self.ref,
+            )
+
+            if validate.errors:
+                for error in validate.errors:
+                    self.logger.error(error)
+                if self.status.installed and not self.content.single:
+                    backup.restore()
+
+            if self.status.installed and not self.content.single:
+                backup.cleanup()
+
+            if validate.success:
+                contents = await self.remote_contents() or {}
+                self.versions.installed_files = {
+                    path: content.sha for path, content in contents.items()
+                }
 
-        if self.status.installed and not self.content.single:
-            backup.cleanup()
+        self.release_objects()
+        return validate
+
+    async def install(self):
+        """Common installation steps of the repository."""
+        # A refresh can not release the GitHub objects while they are used.
+        async with self.lock:
+            validate = await self.install_content()
+
+        if validate.success and self.information.category == "plugin":
+            await async_precompress(
+                self.hass,
+                f"{self.system.config_path}/www/community",
+                self.content.path.local,
+            )
+            await self.asset_index.async_scan(self.content.path.local)
 
         if validate.success:
             if self.information.full_name not in self.common.installed:
                 if self.information.full_name != "custom-components/hacs":
-                    self.common.installed.append(self.information.full_name)
+                    self.common.installed.add(self.information.full_name)
             self.status.installed = True
             self.versions.installed_commit = self.versions.available_commit
 
@@ -384,60 +663,222 @@ class HacsRepository(Hacs):
     async def download_content(self, validate, directory_path, local_directory, ref):
         """Download the content of a directory."""
         try:
-            # Get content
-            if self.content.single:
-                contents = self.content.objects
-            else:
-                contents = await self.repository_object.get_contents(
-                    directory_path, self.ref
-                )
+            contents = await self.gather_content(directory_path)
+        except SystemError:
+            return validate
 
-            for content in contents:
-                if content.type == "dir" and self.content.path.remote != "":
-                    await self.download_content(
-                        validate, content.path, local_directory, ref
-                    )
-                    continue
-                if self.information.category == "plugin":
-                    if not content.name.endswith(".js"):
-                        if self.content.path.remote != "dist":
-                            continue
+        if self.archive_is_cheaper(contents) and await self.download_archive(ref):
+            return validate
 
-                self.logger.debug(f"Downloading {content.name}")
+        # Bound the number of downloads in flight, saving is not limited.
+        semaphore = asyncio.Semaphore(DOWNLOAD_CONCURRENCY)
+        await asyncio.gather(
+            *[self.download_and_save(validate, content, semaphore) for content in contents]
+        )
+        return validate
 
-                filecontent = await async_download_file(self.hass, content.download_url)
+    async def remote_contents(self):
+        """Return {local path: tree entry} for the ref, or None without a tree."""
+        if self.content.path.remote in (None, "release"):
+            return None
+        if await self.get_tree() is None:
+            return None
+        contents = await self.gather_content(self.content.path.remote)
+        if not all(isinstance(content, TreeEntry) for content in contents):
+            return None
+        return {self.local_relative(content): content for content in contents}
+
+    async def upgrade_content(self, validate):
+        """Only download changed files, returns False if that is not possible."""
+        installed_files = self.versions.installed_files
+        if not installed_files:
+            return False
+        contents = await self.remote_contents()
+        if contents is None:
+            return False
 
-                if filecontent is None:
-                    validate.errors.append(f"[{content.name}] was not downloaded.")
-                    continue
+        # Compare with the files on disk, so edited or broken files are
+        # downloaded again, a reinstall repairs them.
+        local = await self.hass.async_add_executor_job(
+            blob_shas, self.content.path.local, list(contents)
+        )
+        changed = [
+            path for path, content in contents.items() if local[path] != content.sha
+        ]
+        removed = [path for path in installed_files if path not in contents]
+        self.logger.debug(f"Upgrading {len(changed)} files, removing {len(removed)}")
+
+        # The compressed variants belong with the files they are made of.
+        files = changed + removed
+        for path in list(files):
+            if path.endswith(EXTENSIONS):
+                files += variants(path)
+        backup = BackupFiles(self.content.path.local, files)
+        backup.create()
+
+        semaphore = asyncio.Semaphore(DOWNLOAD_CONCURRENCY)
+        await asyncio.gather(
+            *[
+                self.download_and_save(validate, contents[path], semaphore)
+                for path in changed
+            ]
+        )
 
-                # Save the content of the file.
-                if self.content.single:
-                    local_directory = self.content.path.local
-                else:
-                    _content_path = content.path
-                    _content_path = _content_path.replace(
-                        f"{self.content.path.remote}/", ""
-                    )
+        if validate.errors:
+            backup.restore()
+        else:
+            for path in removed:
+                for filename in [path] + variants(path):
+                    filename = f"{self.content.path.local}/{filename}"
+                    if os.path.isfile(filename):
+                        os.remove(filename)
+            self.versions.installed_files = {
+                path: content.sha for path, content in contents.items()
+            }
+        backup.cleanup()
+        return True
 
-                    local_directory = f"{self.content.path.local}/{_content_path}"
-                    local_directory = local_directory.split("/")
-                    del local_directory[-1]
-                    local_directory = "/".join(local_directory)
+    def local_relative(self, content):
+        """Return the path of a file, relative to the local path."""
+        if self.content.single:
+            return content.name
+        return content.path.replace(f"{self.content.path.remote}/", "", 1)
 
-                # Check local directory
-                pathlib.Path(local_directory).mkdir(parents=True, exist_ok=True)
+    def archive_is_cheaper(self, contents):
+        """Return a bool if the tarball costs less than the files one by one.
 
-                local_file_path = f"{local_directory}/{content.name}"
-                result = await async_save_file(local_file_path, filecontent)
-                if result:
-                    self.logger.info(f"download of {content.name} complete")
-                    continue
-                validate.errors.append(f"[{content.name}] was not downloaded.")
+        This needs the git tree, for the size of every file in the ref.
+        """
+        if self.tree is None:
+            return False
+        if not contents or not all(isinstance(x, TreeEntry) for x in contents):
+            return False
+        files = sum(x.size or 0 for x in contents) + len(contents) * ARCHIVE_FILE_COST
+        archive = sum(
+            x.size or 0 for x in self.tree.entries.values() if x.type == "file"
+        )
+        return archive < files
 
-        except SystemError:
-            pass
-        return validate
+    async def download_archive(self, ref):
+        """Install from the tarball of the ref, returns False on failure."""
+        if self.content.path.remote in (None, "release"):
+            # Release assets are not part of the tarball.
+            return False
+
+        url = (
+            f"https://api.github.com/repos/{self.information.full_name}"
+            f"/tarball/{ref.replace('tags/', '')}"
+        )
+        archive = None
+        try:
+            archive = await async_download_archive(
+                self.hass, url, self.configuration.token
+            )
+            extracted = await self.hass.async_add_executor_job(
+                extract_archive, archive, self.archive_target
+            )
+        except Exception as exception:
+            self.logger.debug(f"[{exception}] Archive install failed")
+            return False
+        finally:
+            if archive is not None and os.path.exists(archive):
+                os.remove(archive)
+
+        if not extracted:
+            self.logger.debug("Nothing to install in the archive")
+            return False
+        self.logger.info(f"Installed {len(extracted)} files from the archive")
+        return True
+
+    def archive_target(self, name):
+        """Return the local path for a tarball member, or None to skip it."""
+        # The tarball has a single top directory, named after the commit.
+        if "/" not in name:
+            return None
+        name = name.split("/", 1)[1]
+
+        remote = self.content.path.remote
+        if remote:
+            if not name.startswith(f"{remote}/"):
+                return None
+            name = name[len(remote) + 1 :]
+        elif "/" in name:
+            # Directories are not walked in the root of the repository.
+            return None
+
+        filename = name.split("/")[-1]
+        if self.information.category == "plugin":
+            if not filename.endswith(".js"):
+                if remote != "dist":
+                    return None
+
+        if self.content.single:
+            return f"{self.content.path.local}/{filename}"
+        return f"{self.content.path.local}/{name}"
+
+    async def gather_content(self, directory_path):
+        """Return the files to download, walking the tree first."""
+        if self.content.single:
+            contents = self.content.objects
+        else:
+            contents = await self.list_contents(directory_path)
+
+        files = []
+        for content in contents:
+            if content.type == "dir" and self.content.path.remote != "":
+                files += await self.gather_content(content.path)
+                continue
+            if self.information.category == "plugin":
+                if not content.name.endswith(".js"):
+                    if self.content.path.remote != "dist":
+                        continue
+            files.append(content)
+        return files
+
+    def local_directory(self, content):
+        """Return the local directory for a file."""
+        if self.content.single:
+            return self.content.path.local
+        _content_path = content.path.replace(f"{self.content.path.remote}/", "")
+        local_directory = f"{self.content.path.local}/{_content_path}"
+        return "/".join(local_directory.split("/")[:-1])
+
+    async def download_and_save(self, validate, content, semaphore):
+        """Download one file, and save it."""
+        # Check local directory
+        local_directory = self.local_directory(content)
+        pathlib.Path(local_directory).mkdir(parents=True, exist_ok=True)
+
+        # Tree entries carry what is needed to verify the download, and are
+        # built with the plain ref.
+        url = content.download_url
+        sha, size = None, None
+        if isinstance(content, TreeEntry):
+            sha, size = content.sha, content.size
+        elif url is not None and self.ref.startswith("tags/"):
+            # Contents listed with a tags/ ref keep it in the raw URL, where
+            # only the tag name is valid.
+            tag = self.ref.replace("tags/", "", 1)
+            url = url.replace(f"/{self.ref}/", f"/{tag}/", 1)
+
+        async with semaphore:
+            self.logger.debug(f"Downloading {content.name}")
+            try:
+                result = await async_download_to_file(
+                    self.hass,
+                    url,
+                    f"{local_directory}/{content.name}",
+                    sha,
+                    size,
+                )
+            except Exception as exception:
+                self.logger.debug(exception)
+                result = None
+
+        if result:
+            self.logger.info(f"download of {content.name} complete")
+            return
+        validate.errors.append(f"[{content.name}] was not downloaded.")
 
     async def get_info_md_content(self):
         """Get the content of info.md"""
@@ -446,7 +887,7 @@ class HacsRepository(Hacs):
         info = None
         info_files = ["info", "info.md"]
         try:
-            root = await self.repository_object.get_contents("", self.ref)
+            root = await self.list_contents("")
             for file in root:
                 if file.name.lower() in info_files:
                     info = await self.repository_object.get_contents(
@@ -473,9 +914,66 @@ class HacsRepository(Hacs):
         except Exception:  # Gotta Catch 'Em All
             self.information.additional_info = ""
 
-    async def get_releases(self):
+    def release_objects(self):
+        """Drop the API objects that are only needed while refreshing."""
+        self.content.objects = []
+        self.releases.last_release_object = None
+        self.tree = None
+        if self.information.full_name != "custom-components/hacs":
+            self.repository_object = None
+
+    async def get_tree(self):
+        """Return the git tree of the ref, or None if it is not available."""
+        if self.trees is None:
+            return None
+        ref = self.ref.replace("tags/", "")
+        if self.tree is None or self.tree.ref != ref:
+            self.tree = await self.trees.get(self.information.full_name, ref)
+        return self.tree
+
+    async def list_contents(self, path):
+        """List a directory, from the git tree when possible."""
+        tree = await self.get_tree()
+        if tree is not None:
+            return tree.list_dir(path)
+        return await self.repository_object.get_contents(path, self.ref)
+
+    @property
+    def refreshing(self):
+        """Return a bool if the information is being refreshed."""
+        return str(self.information.uid) in REFRESHES
+
+    def refresh_in_background(self):
+        """Refresh the information in a task, shared by concurrent callers."""
+        uid = str(self.information.uid)
+        if uid not in REFRESHES:
+            REFRESHES[uid] = self.hass.async_create_task(self.refresh_information())
+        return REFRESHES[uid]
+
+    async def refresh_information(self):
+        """Update the repository, and mark the information as updated."""
+        try:
+            async with self.lock:
+                await self.update_repository()
+                self.release_objects()
+            self.status.updated_info = True
+            self.data.write()
+        except Exception as exception:
+            self.logger.error(f"Could not refresh the information - {exception}")
+        finally:
+            REFRESHES.pop(str(self.information.uid), None)
+
+    def take_prefetched(self):
+        """Return (and forget) prefetched metadata for the repository."""
+        if self.graphql is None:
+            return None
+        return self.graphql.take(self.information.full_name)
+
+    async def get_releases(self, prefetched=None):
         """Get repository releases."""
-        if self.status.show_beta:
+        if prefetched is not None:
+            temp = [x for x in prefetched if self.status.show_beta or not x.prerelease]
+        elif self.status.show_beta:
             temp = await self.repository_object.get_releases(prerelease=True)
         else:
             temp = await self.repository_object.get_releases(prerelease=False)
@@ -508,11 +1006,9 @@ class HacsRepository(Hacs):
             )
         self.logger.info("Starting removal")
 
-        if self.information.uid in self.common.installed:
-            self.common.installed.remove(self.information.uid)
-        for repository in self.repositories:
-            if repository.information.uid == self.information.uid:
-                self.repositories.remove(repository)
+        self.common.installed.discard(self.information.full_name)
+        self.repositories.remove(self)
+        self.data.mark(self.information.uid)
 
     async def uninstall(self):
         """Run uninstall tasks."""
@@ -523,16 +1019,18 @@ class HacsRepository(Hacs):
             )
         self.logger.info("Uninstalling")
         await self.remove_local_directory()
+        if self.information.category == "plugin":
+            await self.asset_index.async_scan(self.content.path.local)
         self.status.installed = False
         if self.information.category == "integration":
             if self.config_flow:
                 await self.reload_custom_components()
             else:
                 self.pending_restart = True
-        if self.information.full_name in self.common.installed:
-            self.common.installed.remove(self.information.full_name)
+        self.common.installed.discard(self.information.full_name)
         self.versions.installed = None
         self.versions.installed_commit = None
+        self.versions.installed_files = {}
 
     async def remove_local_directory(self):
         """Check the local directory."""
@@ -23,9 +23,7 @@ class HacsTheme(HacsRepository):
         await self.common_validate()
 
         # Custom step 1: Validate content.
-        self.content.objects = await self.repository_object.get_contents(
-            self.content.path.remote, self.ref
-        )
+        self.content.objects = await self.list_contents(self.content.path.remote)
         if not isinstance(self.content.objects, list):
             self.validate.errors.append("Repostitory structure not compliant")
 
@@ -51,15 +49,14 @@ class HacsTheme(HacsRepository):
         # Set name
         self.information.name = self.content.objects[0].name.replace(".yaml", "")
 
-    async def update_repository(self):
+    async def update_repository(self, delta=False):
         """Update."""
         # Run common update steps.
-        await self.common_update()
+        if not await self.common_update(delta):
+            return
 
         # Get theme objects.
-        self.content.objects = await self.repository_object.get_contents(
-            self.content.path.remote, self.ref
-        )
+        self.content.objects = await self.list_contents(self.content.path.remote)
 
         self.content.files = []
         for filename in self.content.objects:
@@ -33,8 +33,8 @@ class HACSSensor(Entity):
 
         self.repositories = []
 
-        for repository in hacs.repositories:
-            if repository.pending_upgrade:
+        for repository in hacs.repositories.hydrated():
+            if repository.view.pending_upgrade:
                 self.repositories.append(repository)
         self._state = len(self.repositories)
 
@@ -73,8 +73,8 @@ class HACSSensor(Entity):
             data.append(
                 {
                     "name": repository.information.full_name,
-                    "installed version": repository.display_installed_version,
-                    "available version": repository.display_available_version,
+                    "installed version": repository.view.installed_version,
+                    "available version": repository.view.available_version,
                 }
             )
         return {"repositories": data}